@@ -6,7 +6,7 @@ from .models import Chat, Message
 class ChatAdmin(admin.ModelAdmin):
     list_display = ['chat_id', 'created_at', 'updated_at']
     list_filter = ['created_at', 'updated_at']
-    readonly_fields = ['chat_id', 'created_at', 'updated_at']
+    readonly_fields = ['chat_id', 'summarized_until', 'created_at', 'updated_at']
     search_fields = ['chat_id']
 
 
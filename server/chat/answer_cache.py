@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .cache_store import SQLiteKVStore, normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Cache of final answers looked up by query-embedding similarity.
+
+    Serves context-free questions (first turn of a chat) whose translated
+    query embeds within ``threshold`` cosine similarity of a previously
+    answered one. Entries expire after ``ttl`` seconds and are ignored once
+    the vector index has been rebuilt, since the answer may then differ.
+    Entries are persisted in SQLite and loaded at startup.
+    """
+
+    def __init__(self, path: Path, threshold: float = 0.95, ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 5000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.store = SQLiteKVStore(path, table='answers', max_entries=max_entries)
+        self.lock = threading.Lock()
+
+        self.keys: List[str] = []
+        self.entries: List[Dict[str, Any]] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        self._load()
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return hashlib.sha256(normalize_text(query).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _load(self) -> None:
+        try:
+            rows = self.store.items(limit=self.max_entries)
+        except Exception as e:
+            logger.error(f"Could not load answer cache: {str(e)}")
+            return
+
+        # Stored most recently used first; keep entries oldest first
+        for key, blob in reversed(rows):
+            try:
+                entry = json.loads(blob.decode('utf-8'))
+            except ValueError:
+                continue
+            self.keys.append(key)
+            self.entries.append(entry)
+        self._rebuild_matrix()
+        logger.info(f"Loaded {len(self.entries)} cached answers")
+
+    def _rebuild_matrix(self) -> None:
+        if self.entries:
+            self.matrix = np.stack([self._unit(entry['vector']) for entry in self.entries])
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def _drop(self, index: int) -> None:
+        self._drop_many([index])
+
+    def _drop_many(self, indices: List[int]) -> None:
+        for index in indices:
+            self.store.delete(self.keys[index])
+        dropped = set(indices)
+        self.keys = [key for i, key in enumerate(self.keys) if i not in dropped]
+        self.entries = [entry for i, entry in enumerate(self.entries) if i not in dropped]
+        self.matrix = np.delete(self.matrix, indices, axis=0)
+
+    def lookup(self, vector: List[float], index_revision: str) -> Optional[str]:
+        """Return a cached answer for a similar enough query, or None."""
+        with self.lock:
+            # Evict expired entries and ones answered from an older index
+            # first, so a stale near-match can't hide a fresh one
+            now = time.time()
+            stale = [i for i, entry in enumerate(self.entries)
+                     if now - entry['created_at'] > self.ttl or entry['index_revision'] != index_revision]
+            if stale:
+                self._drop_many(stale)
+
+            if not self.entries:
+                self.misses += 1
+                return None
+
+            query = self._unit(vector)
+            if query.shape[0] != self.matrix.shape[1]:
+                self.misses += 1
+                return None
+
+            scores = self.matrix @ query
+            best = int(np.argmax(scores))
+            entry = self.entries[best]
+
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            logger.info(f"Answer cache hit (similarity {scores[best]:.3f}) for '{entry['query'][:50]}...'")
+            return entry['answer']
+
+    def store_answer(self, query: str, vector: List[float], answer: str, index_revision: str) -> None:
+        entry = {
+            'query': query,
+            'vector': [float(x) for x in vector],
+            'answer': answer,
+            'created_at': time.time(),
+            'index_revision': index_revision,
+        }
+        key = self._key(query)
+
+        with self.lock:
+            if key in self.keys:
+                self._drop(self.keys.index(key))
+            if len(self.entries) >= self.max_entries:
+                # Entries are kept oldest first
+                self._drop(0)
+
+            self.keys.append(key)
+            self.entries.append(entry)
+            unit = self._unit(vector)[np.newaxis, :]
+            self.matrix = unit if self.matrix.size == 0 else np.vstack([self.matrix, unit])
+            self.store.set(key, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+            self.stores += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.keys = []
+            self.entries = []
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+            self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'threshold': self.threshold,
+                'ttl': self.ttl,
+            }
+
+
+# Global instance
+answer_cache = SemanticAnswerCache(
+    path=Path(os.getenv(
+        'ANSWER_CACHE_PATH',
+        Path(__file__).resolve().parent.parent / 'cache' / 'answers.sqlite3'
+    )),
+    threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', 0.95)),
+    ttl=float(os.getenv('ANSWER_CACHE_TTL', 7 * 24 * 3600)),
+    max_entries=int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 5000))
+)
@@ -0,0 +1,172 @@
+import sqlite3
+import threading
+import time
+import logging
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different spellings share a cache entry."""
+    return ' '.join(unicodedata.normalize('NFC', text).lower().split())
+
+
+class SQLiteKVStore:
+    """
+    Small persistent key/value store on top of SQLite.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is
+    exceeded. A single connection is shared between threads behind a lock.
+    """
+
+    def __init__(self, path: Path, table: str, max_entries: int = 100000):
+        self.path = Path(path)
+        self.table = table
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+        self.conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Return the stored values for whichever of ``keys`` are present."""
+        found = {}
+        if not keys:
+            return found
+
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                placeholders = ','.join('?' * len(part))
+                rows = self.conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})", part
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    f"UPDATE {self.table} SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self.conn.commit()
+        return found
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, last_used) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items]
+            )
+            self._evict()
+            self.conn.commit()
+
+    def set(self, key: str, value: bytes) -> None:
+        self.set_many([(key, value)])
+
+    def items(self, limit: Optional[int] = None) -> List[Tuple[str, bytes]]:
+        """Return stored entries, most recently used first."""
+        with self.lock:
+            return self.conn.execute(
+                f"SELECT key, value FROM {self.table} ORDER BY last_used DESC LIMIT ?",
+                (limit if limit is not None else -1,)
+            ).fetchall()
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: List[str]) -> None:
+        with self.lock:
+            self.conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key in keys])
+            self.conn.commit()
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute(f"DELETE FROM {self.table}")
+            self.conn.commit()
+
+    def _evict(self) -> None:
+        excess = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_used ASC LIMIT ?)",
+                (excess,)
+            )
+            logger.debug(f"Evicted {excess} entries from {self.table}")
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with an optional time-to-live.
+
+    Keeps hit/miss counters so callers can report cache effectiveness.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            item = self.entries.get(key)
+            if item is not None:
+                stored_at, value = item
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+            }
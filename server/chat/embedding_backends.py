@@ -0,0 +1,132 @@
+import os
+import zlib
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from .embedding_cache import CachedEmbeddings
+from .lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('google', 'sentence-transformers', 'hashing')
+
+# Indexes built before the backend was recorded were all built with this
+LEGACY_BACKEND_ID = 'google:models/embedding-001'
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature-hashed bag of words and word pairs, L2-normalized.
+
+    Needs no model download or network and embeds a query in well under a
+    millisecond. Quality is closer to keyword matching than to a trained
+    model, which is often good enough for a small domain corpus.
+    """
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+        self.model = f"hashing-{dimensions}"
+
+    def _embed(self, text: str) -> List[float]:
+        terms = tokenize(text)
+        features = terms + [f"{first} {second}" for first, second in zip(terms, terms[1:])]
+
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in features:
+            # crc32 is stable across processes, unlike hash()
+            h = zlib.crc32(feature.encode('utf-8'))
+            vector[h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+
+        # Damp repeated terms, then normalize for cosine similarity
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """Local sentence-transformers model run on the CPU."""
+
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=sentence-transformers needs the sentence-transformers package"
+            ) from e
+
+        self.model = model_name
+        self.client = SentenceTransformer(model_name, device='cpu')
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.encode(texts, batch_size=32, normalize_embeddings=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+
+class GoogleEmbeddings(GoogleGenerativeAIEmbeddings):
+    """Gemini embeddings that can embed a list of queries in one request."""
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        # Same task type embed_query uses, so vectors match single queries
+        return self.embed_documents(texts, task_type="retrieval_query")
+
+
+def default_backend() -> str:
+    """EMBEDDING_BACKEND if set, else Google with an API key and hashing without one."""
+    return os.getenv('EMBEDDING_BACKEND') or ('google' if os.getenv('GOOGLE_API_KEY') else 'hashing')
+
+
+def create_embeddings(backend: str, cache_path: Path) -> Tuple[Optional[Embeddings], Optional[str]]:
+    """
+    Build the embeddings client for a backend.
+
+    Returns ``(embeddings, backend_id)``. The id names the backend and
+    model and is recorded with the index, since vectors from different
+    backends can't be compared. Returns ``(None, None)`` if the backend
+    can't be used here.
+    """
+    if backend not in BACKENDS:
+        logger.error(f"Unknown EMBEDDING_BACKEND '{backend}', expected one of: {', '.join(BACKENDS)}")
+        return None, None
+
+    cache_entries = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 200000))
+
+    if backend == 'hashing':
+        # Cheaper to recompute than to look up
+        embeddings = HashingEmbeddings(int(os.getenv('HASHING_EMBEDDING_DIM', 1024)))
+        return embeddings, f"hashing:{embeddings.dimensions}"
+
+    if backend == 'sentence-transformers':
+        model_name = os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+        try:
+            embeddings = SentenceTransformerEmbeddings(model_name)
+        except Exception as e:
+            logger.error(f"Could not load sentence-transformers model {model_name}: {str(e)}")
+            return None, None
+        return CachedEmbeddings(embeddings, path=cache_path, max_entries=cache_entries), f"{backend}:{model_name}"
+
+    api_key = os.getenv('GOOGLE_API_KEY')
+    if not api_key:
+        logger.warning("No GOOGLE_API_KEY found. Vector store functionality will be limited.")
+        return None, None
+
+    embeddings = GoogleEmbeddings(model="models/embedding-001", google_api_key=api_key)
+    return CachedEmbeddings(embeddings, path=cache_path, max_entries=cache_entries), LEGACY_BACKEND_ID
@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import threading
+import logging
+from array import array
+from pathlib import Path
+from typing import Awaitable, Callable, List, Dict, Any, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from .cache_store import LRUCache, SQLiteKVStore, normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Embed several queries in one call if the client supports it, else one by one."""
+    if hasattr(embeddings, 'embed_queries'):
+        return embeddings.embed_queries(texts)
+    return [embeddings.embed_query(text) for text in texts]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed, disk-backed cache in front of an embeddings client.
+
+    Vectors are keyed by the model name plus a SHA-256 of the text, so
+    identical chunks are only ever embedded once per model, across
+    rebuilds and chunking experiments.
+    """
+
+    def __init__(self, embeddings: Embeddings, path: Path, max_entries: int = 200000):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, 'model', None) or type(embeddings).__name__
+        self.store = SQLiteKVStore(path, table='embeddings', max_entries=max_entries)
+
+        self.hits = 0
+        self.misses = 0
+        self.stats_lock = threading.Lock()
+
+    def _key(self, text: str) -> str:
+        return f"{self.model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        return array('d', vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        vector = array('d')
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def _count(self, hits: int, misses: int) -> None:
+        with self.stats_lock:
+            self.hits += hits
+            self.misses += misses
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_via(texts, self.embeddings.embed_documents)
+
+    def embed_documents_via(self, texts: List[str],
+                            embed_missing: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        Same as embed_documents, with cache misses embedded by ``embed_missing``.
+
+        Lets callers wrap only real API requests, e.g. in a rate limiter;
+        ``embed_missing`` is not called when every text is cached.
+        """
+        keys = [self._key(text) for text in texts]
+        cached = self.store.get_many(list(set(keys)))
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        self._count(len(texts) - len(missing), len(missing))
+
+        vectors: Dict[str, List[float]] = {key: self._unpack(blob) for key, blob in cached.items()}
+        if missing:
+            # Embed each distinct missing text once
+            pending = {}
+            for i in missing:
+                pending.setdefault(keys[i], texts[i])
+            new_vectors = embed_missing(list(pending.values()))
+            vectors.update(zip(pending.keys(), new_vectors))
+            self.store.set_many((key, self._pack(vectors[key])) for key in pending)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        # Queries use a different task type than documents, so they get their own keys
+        key = 'query:' + self._key(text)
+        blob = self.store.get(key)
+        if blob is not None:
+            self._count(1, 0)
+            return self._unpack(blob)
+
+        self._count(0, 1)
+        vector = self.embeddings.embed_query(text)
+        self.store.set(key, self._pack(vector))
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, sending all uncached ones in a single request."""
+        keys = ['query:' + self._key(text) for text in texts]
+        cached = self.store.get_many(list(set(keys)))
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        self._count(len(texts) - len(missing), len(missing))
+
+        vectors: Dict[str, List[float]] = {key: self._unpack(blob) for key, blob in cached.items()}
+        if missing:
+            pending = {}
+            for i in missing:
+                pending.setdefault(keys[i], texts[i])
+            new_vectors = embed_queries(self.embeddings, list(pending.values()))
+            vectors.update(zip(pending.keys(), new_vectors))
+            self.store.set_many((key, self._pack(vectors[key])) for key in pending)
+
+        return [vectors[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = 'query:' + self._key(text)
+        blob = await asyncio.to_thread(self.store.get, key)
+        if blob is not None:
+            self._count(1, 0)
+            return self._unpack(blob)
+
+        self._count(0, 1)
+        vector = await self.embeddings.aembed_query(text)
+        await asyncio.to_thread(self.store.set, key, self._pack(vector))
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            total = self.hits + self.misses
+            return {
+                'model': self.model,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': self.store.count(),
+                'max_entries': self.store.max_entries,
+            }
+
+
+class QueryEmbeddingCache:
+    """
+    In-process LRU of query text -> embedding vector for the search path.
+
+    If ``shared_cache`` names a Django cache alias (e.g. a Redis or
+    memcached backend), misses in the local LRU are looked up there
+    before calling the embeddings API, so workers share their entries.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: Optional[float] = 3600,
+                 shared_cache: Optional[str] = None):
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.ttl = ttl
+        self.shared_cache = shared_cache
+
+    def _shared(self):
+        if not self.shared_cache:
+            return None
+        try:
+            from django.core.cache import caches
+            return caches[self.shared_cache]
+        except Exception as e:
+            logger.warning(f"Shared query embedding cache '{self.shared_cache}' unavailable: {str(e)}")
+            return None
+
+    def get_or_embed(self, text: str, model: str, embed: Callable[[str], List[float]]) -> List[float]:
+        normalized = normalize_text(text)
+        key = f"{model}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+        vector = self.local.get(key)
+        if vector is not None:
+            return vector
+
+        shared = self._shared()
+        if shared is not None:
+            vector = shared.get(f"query_embedding:{key}")
+
+        if vector is None:
+            vector = embed(normalized)
+            if shared is not None:
+                shared.set(f"query_embedding:{key}", vector, timeout=self.ttl)
+
+        self.local.set(key, vector)
+        return vector
+
+    def get_or_embed_many(self, texts: List[str], model: str,
+                          embed_many: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Batch version of get_or_embed: all misses are embedded with one ``embed_many`` call."""
+        normalized = [normalize_text(text) for text in texts]
+        keys = [f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}" for text in normalized]
+
+        vectors = {}
+        for key in keys:
+            vector = self.local.get(key)
+            if vector is not None:
+                vectors[key] = vector
+
+        shared = self._shared()
+        if shared is not None:
+            missing = [f"query_embedding:{key}" for key in keys if key not in vectors]
+            if missing:
+                for shared_key, vector in shared.get_many(missing).items():
+                    vectors[shared_key[len("query_embedding:"):]] = vector
+
+        pending = {}
+        for key, text in zip(keys, normalized):
+            if key not in vectors:
+                pending.setdefault(key, text)
+        if pending:
+            new_vectors = dict(zip(pending.keys(), embed_many(list(pending.values()))))
+            vectors.update(new_vectors)
+            if shared is not None:
+                shared.set_many({f"query_embedding:{key}": vector for key, vector in new_vectors.items()},
+                                timeout=self.ttl)
+
+        for key in set(keys):
+            self.local.set(key, vectors[key])
+        return [vectors[key] for key in keys]
+
+    async def aget_or_embed(self, text: str, model: str,
+                            aembed: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """Async version of get_or_embed; the shared cache is consulted off the event loop."""
+        normalized = normalize_text(text)
+        key = f"{model}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+        vector = self.local.get(key)
+        if vector is not None:
+            return vector
+
+        shared = self._shared()
+        if shared is not None:
+            vector = await asyncio.to_thread(shared.get, f"query_embedding:{key}")
+
+        if vector is None:
+            vector = await aembed(normalized)
+            if shared is not None:
+                await asyncio.to_thread(shared.set, f"query_embedding:{key}", vector, self.ttl)
+
+        self.local.set(key, vector)
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.local.stats(), shared_cache=self.shared_cache)
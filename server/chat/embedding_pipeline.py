@@ -0,0 +1,156 @@
+import os
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Callable, Iterable, Tuple
+
+from langchain.schema import Document
+
+from .embedding_cache import CachedEmbeddings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to keep request rate under the API quota."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until ``tokens`` are available, then take them."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                sleep_for = (tokens - self.tokens) / self.rate
+            time.sleep(sleep_for)
+
+
+class EmbeddingError(Exception):
+    """Raised when one or more batches could not be embedded after all retries."""
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return '429' in text or 'resourceexhausted' in text or 'rate limit' in text or 'quota' in text
+
+
+class EmbeddingPipeline:
+    """
+    Embed document chunks in batches with several requests in flight.
+
+    Requests are paced by a token bucket, failed batches are retried with
+    exponential backoff, and every batch is handed to ``on_batch`` as soon
+    as it is embedded so completed work is persisted even if a later batch
+    fails.
+    """
+
+    def __init__(self, embeddings, batch_size: int = None, max_in_flight: int = None,
+                 requests_per_minute: float = None, max_retries: int = None):
+        self.embeddings = embeddings
+        self.batch_size = batch_size or int(os.getenv('EMBED_BATCH_SIZE', 64))
+        self.max_in_flight = max_in_flight or int(os.getenv('EMBED_CONCURRENCY', 4))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('EMBED_MAX_RETRIES', 5))
+
+        requests_per_minute = requests_per_minute or float(os.getenv('EMBED_REQUESTS_PER_MINUTE', 60))
+        self.limiter = TokenBucket(
+            rate_per_second=requests_per_minute / 60.0,
+            capacity=max(1.0, float(self.max_in_flight))
+        )
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if isinstance(self.embeddings, CachedEmbeddings):
+            # Cache hits make no request, so only misses take a rate-limit token
+            backend = self.embeddings.embeddings
+            return self.embeddings.embed_documents_via(
+                texts, lambda missing: self._request(backend.embed_documents, missing)
+            )
+        return self._request(self.embeddings.embed_documents, texts)
+
+    def _request(self, embed: Callable[[List[str]], List[List[float]]], texts: List[str]) -> List[List[float]]:
+        """Call the embedding API within the rate limit, retrying failures with backoff."""
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return embed(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+
+                # Back off harder when the API tells us we're over quota
+                sleep_for = delay * (4 if _is_rate_limit_error(e) else 1) + random.uniform(0, delay)
+                logger.warning(f"Embedding batch failed (attempt {attempt + 1}/{self.max_retries + 1}): "
+                               f"{str(e)}; retrying in {sleep_for:.1f}s")
+                time.sleep(sleep_for)
+                delay = min(delay * 2, 60.0)
+
+    def run_stream(self, batches: Iterable[Tuple[List[str], List[Document]]],
+                   on_batch: Callable[[List[str], List[Document], List[List[float]]], None]) -> int:
+        """
+        Embed ``(ids, docs)`` batches and call ``on_batch(ids, docs, vectors)`` for each one.
+
+        Batches are pulled from the iterable lazily and at most
+        ``max_in_flight`` are held at a time, so memory stays flat however
+        many chunks the iterable produces. ``on_batch`` is called from the
+        calling thread, so it does not need to be thread-safe.
+
+        Returns:
+            Number of chunks embedded and handed to ``on_batch``.
+
+        Raises:
+            EmbeddingError: if any batch still failed after retrying. Batches
+            that succeeded have already been passed to ``on_batch``.
+        """
+        done = 0
+        submitted = 0
+        failures = []
+        batches = iter(batches)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            pending = {}
+
+            def submit_next() -> bool:
+                batch = next(batches, None)
+                if batch is None:
+                    return False
+                batch_ids, batch_docs = batch
+                future = executor.submit(self._embed_batch, [doc.page_content for doc in batch_docs])
+                pending[future] = (batch_ids, batch_docs)
+                return True
+
+            while len(pending) < self.max_in_flight and submit_next():
+                submitted += 1
+
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch_ids, batch_docs = pending.pop(future)
+                    try:
+                        vectors = future.result()
+                        on_batch(batch_ids, batch_docs, vectors)
+                        done += len(batch_ids)
+                        logger.info(f"Embedded {done} chunks")
+                    except Exception as e:
+                        logger.error(f"Embedding batch of {len(batch_ids)} chunks failed: {str(e)}")
+                        failures.append(e)
+
+                    if submit_next():
+                        submitted += 1
+
+        if failures:
+            raise EmbeddingError(f"{len(failures)} of {submitted} batches failed; {done} chunks were stored")
+        return done
@@ -0,0 +1,241 @@
+import json
+import os
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the ``k`` highest scores, best first, without sorting the rest."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+QUANTIZATIONS = ('none', 'float16', 'int8')
+
+# Rows converted to float32 at a time when scanning a quantized matrix
+_SCAN_BLOCK = 4096
+
+
+def quantize(matrix: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Compact copy of a float32 matrix.
+
+    Returns ``(compact, scale)``: float16 values and no scale, or int8
+    codes with a per-dimension scale so that ``codes * scale`` approximates
+    the original.
+    """
+    if quantization == 'float16':
+        return matrix.astype(np.float16), None
+
+    scale = np.abs(matrix).max(axis=0) / 127.0 if len(matrix) else np.ones(matrix.shape[1])
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scale), -127, 127).astype(np.int8)
+    return codes, scale.astype(np.float32)
+
+
+class ExactIndex:
+    """
+    Brute-force cosine search over a contiguous float32 matrix of unit vectors.
+
+    For a few thousand chunks one matrix-vector product is faster than an
+    HNSW lookup through the Chroma client. The matrix is saved as a
+    ``.npy`` sidecar next to the vectorstore and memory-mapped on load, so
+    worker processes share one copy through the page cache.
+
+    With ``quantization`` set to 'float16' or 'int8' the scan runs over a
+    2x or 4x smaller copy, and only the best ``rescore_factor * k``
+    candidates are re-scored against the full-precision rows. Those rows
+    stay memory-mapped, so just the candidates' pages are read.
+    """
+
+    MATRIX_FILE = 'embeddings.npy'
+    IDS_FILE = 'ids.json'
+    COMPACT_FILES = {'float16': 'embeddings.float16.npy', 'int8': 'embeddings.int8.npy'}
+    SCALE_FILE = 'scale.int8.npy'
+
+    def __init__(self, ids: List[str], matrix: np.ndarray, revision: str = '',
+                 quantization: str = 'none', rescore_factor: int = 4,
+                 compact: Optional[np.ndarray] = None, scale: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.matrix = matrix
+        self.revision = revision
+        self.positions: Dict[str, int] = {chunk_id: i for i, chunk_id in enumerate(ids)}
+
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        if quantization != 'none' and compact is None:
+            compact, scale = quantize(np.asarray(matrix), quantization)
+        self.compact = compact
+        self.scale = scale
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @classmethod
+    def from_vectors(cls, ids: List[str], vectors: Sequence[Sequence[float]], revision: str = '') -> 'ExactIndex':
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.size == 0:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        else:
+            matrix = np.ascontiguousarray(cls._normalize(matrix), dtype=np.float32)
+        return cls(list(ids), matrix, revision)
+
+    @classmethod
+    def from_collection(cls, collection, revision: str = '') -> 'ExactIndex':
+        """Copy every stored embedding out of a Chroma collection."""
+        stored = collection.get(include=['embeddings'])
+        return cls.from_vectors(stored['ids'], stored['embeddings'], revision)
+
+    @staticmethod
+    def _save_array(directory: Path, name: str, array: np.ndarray) -> None:
+        # Per-process temp names: several workers may rebuild at once
+        tmp_path = directory / f"{name}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            np.save(fh, array)
+        tmp_path.replace(directory / name)
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the sidecar files, including every quantized form.
+
+        The ids file is replaced last so readers never see a partial set.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self._save_array(directory, self.MATRIX_FILE, self.matrix)
+        if len(self.ids):
+            for quantization, name in self.COMPACT_FILES.items():
+                compact, scale = quantize(np.asarray(self.matrix), quantization)
+                self._save_array(directory, name, compact)
+                if scale is not None:
+                    self._save_array(directory, self.SCALE_FILE, scale)
+
+        tmp_ids = directory / f"{self.IDS_FILE}.{os.getpid()}.tmp"
+        with open(tmp_ids, 'w', encoding='utf-8') as fh:
+            json.dump({'revision': self.revision, 'ids': self.ids}, fh)
+        tmp_ids.replace(directory / self.IDS_FILE)
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True, quantization: str = 'none',
+             rescore_factor: int = 4) -> Optional['ExactIndex']:
+        """Load the sidecar, or return None if it is missing or inconsistent."""
+        mmap_mode = 'r' if mmap else None
+        try:
+            with open(directory / cls.IDS_FILE, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+            matrix = np.load(directory / cls.MATRIX_FILE, mmap_mode=mmap_mode)
+        except (OSError, ValueError) as e:
+            logger.info(f"No usable exact index sidecar in {directory}: {str(e)}")
+            return None
+
+        if len(data['ids']) != matrix.shape[0]:
+            logger.warning("Exact index sidecar ids and matrix disagree, ignoring it")
+            return None
+
+        compact = scale = None
+        if quantization != 'none' and data['ids']:
+            try:
+                compact = np.load(directory / cls.COMPACT_FILES[quantization], mmap_mode=mmap_mode)
+                if quantization == 'int8':
+                    scale = np.load(directory / cls.SCALE_FILE)
+            except (OSError, ValueError):
+                compact = scale = None
+            if compact is not None and compact.shape[0] != matrix.shape[0]:
+                compact = scale = None
+            # Without a usable file the index quantizes in memory
+
+        return cls(data['ids'], matrix, data.get('revision', ''), quantization=quantization,
+                   rescore_factor=rescore_factor, compact=compact, scale=scale)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.matrix.nbytes)
+
+    @property
+    def scan_bytes(self) -> int:
+        """Size of the matrix every query scans."""
+        return int(self.compact.nbytes) if self.compact is not None else self.nbytes
+
+    def vectors(self, chunk_ids: List[str]) -> Optional[np.ndarray]:
+        """Stored (unit) vectors for the given ids, or None if any is missing."""
+        try:
+            return self.matrix[[self.positions[chunk_id] for chunk_id in chunk_ids]]
+        except KeyError:
+            return None
+
+    def rows_for(self, chunk_ids: Iterable[str]) -> np.ndarray:
+        """Sorted matrix rows of the given ids; ids not in the index are skipped."""
+        return np.array(sorted(self.positions[chunk_id] for chunk_id in chunk_ids if chunk_id in self.positions),
+                        dtype=np.int64)
+
+    def _approximate_scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scores of all (or the given) rows against ``queries`` from the quantized matrix, a block at a time."""
+        if self.quantization == 'int8':
+            # codes @ (scale * q) == (codes * scale) @ q
+            queries = queries * self.scale
+        compact = self.compact if rows is None else self.compact[rows]
+        scores = np.empty((len(queries), len(compact)), dtype=np.float32)
+        for start in range(0, len(compact), _SCAN_BLOCK):
+            block = np.asarray(compact[start:start + _SCAN_BLOCK], dtype=np.float32)
+            scores[:, start:start + _SCAN_BLOCK] = queries @ block.T
+        return scores
+
+    def search(self, query_vector: Sequence[float], k: int,
+               rows: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Return ``(chunk_id, cosine similarity)`` for the ``k`` nearest chunks."""
+        return self.search_many([query_vector], k, rows=rows)[0]
+
+    def search_many(self, query_vectors: Sequence[Sequence[float]], k: int,
+                    rows: Optional[np.ndarray] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Batch version of search: one matrix-matrix product for all queries.
+
+        With ``rows`` (see rows_for), only those rows are scored, so a
+        narrow filter scans a fraction of the matrix.
+        """
+        if not self.ids or (rows is not None and not len(rows)):
+            return [[] for _ in query_vectors]
+        queries = self._normalize(np.asarray(query_vectors, dtype=np.float32))
+
+        if self.compact is None:
+            matrix = self.matrix if rows is None else self.matrix[rows]
+            results = []
+            for row in queries @ matrix.T:
+                best = top_k(row, k)
+                positions = best if rows is None else rows[best]
+                results.append([(self.ids[p], float(row[i])) for p, i in zip(positions, best)])
+            return results
+
+        results = []
+        for query, row in zip(queries, self._approximate_scores(queries, rows)):
+            # Re-score the best approximate candidates at full precision
+            candidates = top_k(row, k * self.rescore_factor)
+            candidates = np.sort(candidates if rows is None else rows[candidates])
+            exact_scores = self.matrix[candidates] @ query
+            results.append([(self.ids[candidates[i]], float(exact_scores[i])) for i in top_k(exact_scores, k)])
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'chunks': len(self.ids),
+            'dimensions': int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0,
+            'bytes': self.nbytes,
+            'scan_bytes': self.scan_bytes,
+            'quantization': self.quantization,
+            'memory_mapped': isinstance(self.matrix, np.memmap),
+        }
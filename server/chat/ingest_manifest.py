@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path: Path, block_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class IngestManifest:
+    """
+    Record of which PDFs are in the vector store and which chunk ids they own.
+
+    Stored as JSON next to ``chroma_db/`` so a rebuild can work out which
+    files were added, changed or removed since the last ingestion. Also
+    records which embedding backend and chunking settings built the index.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.embedding_backend: Optional[str] = None
+        # {'chunk_size': ..., 'chunk_overlap': ...} the chunks were split with
+        self.chunking: Optional[Dict[str, int]] = None
+        # Last contents read or written, so unchanged manifests aren't rewritten
+        self._saved: Optional[str] = None
+        # (mtime_ns, revision) of the file as last read by revision()
+        self._revision_cache: Tuple[Optional[int], str] = (None, '')
+        self.load()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def content_revision(self) -> str:
+        """
+        Digest of the fully indexed files' hashes, the embedding backend and chunking.
+
+        Saving progress or refreshing stat fields doesn't change it, only
+        a file finishing indexing, being removed or a settings change does.
+        """
+        if not self.files and not self.embedding_backend:
+            return ''
+        indexed = sorted((name, entry['hash']) for name, entry in self.files.items() if entry.get('hash'))
+        payload = json.dumps([self.embedding_backend, self.chunking, indexed], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def revision(self) -> str:
+        """
+        Token that changes whenever the indexed content changes.
+
+        Read from the file itself so every worker process sees a rebuild
+        done by another process; the file is only re-read when its mtime
+        moves.
+        """
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return ''
+
+        cached_mtime, revision = self._revision_cache
+        if mtime != cached_mtime:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                return revision
+            revision = data.get('revision') or str(mtime)
+            self._revision_cache = (mtime, revision)
+        return revision
+
+    def load(self) -> None:
+        """Load the manifest from disk, starting empty if it is missing or unreadable."""
+        self.files = {}
+        self.embedding_backend = None
+        self.chunking = None
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+            self.files = data.get('files', {})
+            self.embedding_backend = data.get('embedding_backend')
+            self.chunking = data.get('chunking')
+            # Manifests written before the revision field get it on next save
+            self._saved = self._serialize() if 'revision' in data else None
+        except Exception as e:
+            logger.error(f"Error reading ingest manifest {self.path}: {str(e)}")
+            self.files = {}
+
+    def _serialize(self) -> str:
+        return json.dumps({
+            'version': self.VERSION,
+            'embedding_backend': self.embedding_backend,
+            'chunking': self.chunking,
+            'revision': self.content_revision(),
+            'files': self.files,
+        }, indent=2, sort_keys=True)
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk, unless it is unchanged."""
+        contents = self._serialize()
+        if contents == self._saved and self.path.exists():
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            fh.write(contents)
+        tmp_path.replace(self.path)
+        self._saved = contents
+
+    def diff(self, pdf_files: List[Path]) -> Tuple[List[Tuple[Path, str]], List[str]]:
+        """
+        Compare the files on disk with the manifest.
+
+        Files whose size and mtime match the manifest are trusted without
+        hashing; everything else is hashed and compared by content.
+
+        Returns:
+            (changed, removed) where ``changed`` is a list of ``(path, digest)``
+            for new or modified files and ``removed`` lists file names that
+            are in the manifest but no longer on disk.
+        """
+        changed = []
+        seen = set()
+
+        for pdf_file in pdf_files:
+            seen.add(pdf_file.name)
+            stat = pdf_file.stat()
+            entry = self.files.get(pdf_file.name)
+
+            if (entry and entry.get('hash') and entry.get('size') == stat.st_size
+                    and entry.get('mtime') == stat.st_mtime):
+                continue
+
+            digest = file_digest(pdf_file)
+            if entry and entry.get('hash') == digest:
+                # Touched but not modified: refresh the stat fields only
+                entry['mtime'] = stat.st_mtime
+                entry['size'] = stat.st_size
+                continue
+
+            changed.append((pdf_file, digest))
+
+        removed = [name for name in self.files if name not in seen]
+        return changed, removed
+
+    def chunk_ids(self, name: str) -> List[str]:
+        return list(self.files.get(name, {}).get('chunk_ids', []))
+
+    def record(self, pdf_file: Path, digest: Optional[str], chunk_ids: List[str]) -> None:
+        """
+        Record the chunks stored for a file.
+
+        A ``digest`` of ``None`` marks the file as partially indexed, so the
+        next diff reports it as changed.
+        """
+        stat = pdf_file.stat()
+        self.files[pdf_file.name] = {
+            'hash': digest,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'chunk_ids': chunk_ids,
+        }
+
+    def record_progress(self, pdf_file: Path, digest: str, committed_ids: List[str]) -> None:
+        """Checkpoint the chunks of a file that are already stored while it is being indexed."""
+        self.record(pdf_file, None, committed_ids)
+        self.files[pdf_file.name]['pending_hash'] = digest
+
+    def committed_chunk_ids(self, name: str, digest: str) -> Set[str]:
+        """Chunk ids already stored by an interrupted run over the same file contents."""
+        entry = self.files.get(name, {})
+        if entry.get('hash') is None and entry.get('pending_hash') == digest:
+            return set(entry.get('chunk_ids', []))
+        return set()
+
+    def remove(self, name: str) -> None:
+        self.files.pop(name, None)
+
+    def clear(self) -> None:
+        self.files = {}
+        self.embedding_backend = None
+        self.chunking = None
@@ -0,0 +1,207 @@
+import heapq
+import json
+import math
+import re
+import threading
+import logging
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from .cache_store import SQLiteKVStore, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Latin words and numbers, or Devanagari runs including their vowel signs
+# (which \w alone would split on). The danda is treated as punctuation.
+_WORD_RE = re.compile("[\\w\u0900-\u0963\u0966-\u097F]+", re.UNICODE)
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from how i in is it of on or that the this to was what
+when which who why will with can do does my our your should there their them
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms, dropping common English stopwords."""
+    return [term for term in _WORD_RE.findall(normalize_text(text)) if term not in _STOPWORDS]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[Document]], k: int = 60) -> List[Tuple[Document, float]]:
+    """
+    Merge ranked result lists into one, scoring each chunk by ``sum(1 / (k + rank))``.
+
+    Chunks are matched across lists by id, or by content when a list
+    carries no ids.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = getattr(doc, 'id', None) or doc.page_content
+            scores[key] += 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    return [(docs[key], score) for key, score in sorted(scores.items(), key=lambda item: -item[1])]
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over the same chunks as the vectorstore.
+
+    Chunk text and metadata are persisted in SQLite as they are ingested;
+    postings are rebuilt in memory on load, which for a few thousand
+    chunks takes well under a second. Queries need no network access, so
+    this also serves as the retrieval path when embeddings are unavailable.
+
+    An optional ``metadata_index`` (see metadata_filter.MetadataIndex) is
+    kept in step with the indexed chunks.
+    """
+
+    def __init__(self, path: Path, k1: float = 1.5, b: float = 0.75, metadata_index=None):
+        self.k1 = k1
+        self.b = b
+        self.metadata_index = metadata_index
+        # An index, not a cache: never evict
+        self.store = SQLiteKVStore(path, table='chunks', max_entries=10 ** 9)
+        self.lock = threading.RLock()
+
+        self.documents: Dict[str, Document] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.total_length = 0
+
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            rows = self.store.items()
+        except Exception as e:
+            logger.error(f"Could not load lexical index: {str(e)}")
+            return
+
+        with self.lock:
+            for chunk_id, blob in rows:
+                entry = json.loads(blob.decode('utf-8'))
+                self._add_in_memory(chunk_id, Document(
+                    page_content=entry['text'], metadata=entry['metadata'], id=chunk_id
+                ))
+        logger.info(f"Loaded lexical index with {len(self.documents)} chunks")
+
+    def _add_in_memory(self, chunk_id: str, doc: Document) -> None:
+        if chunk_id in self.documents:
+            self._remove_in_memory(chunk_id)
+
+        terms = Counter(tokenize(doc.page_content))
+        for term, count in terms.items():
+            self.postings[term][chunk_id] = count
+        self.documents[chunk_id] = doc
+        self.doc_lengths[chunk_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[chunk_id]
+        if self.metadata_index is not None:
+            self.metadata_index.add(chunk_id, doc.page_content, doc.metadata)
+
+    def _remove_in_memory(self, chunk_id: str) -> None:
+        doc = self.documents.pop(chunk_id, None)
+        if doc is None:
+            return
+
+        for term in set(tokenize(doc.page_content)):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(chunk_id)
+        if self.metadata_index is not None:
+            self.metadata_index.remove(chunk_id)
+
+    def add(self, chunk_ids: List[str], docs: List[Document]) -> None:
+        """Index (or re-index) chunks under the given ids."""
+        with self.lock:
+            for chunk_id, doc in zip(chunk_ids, docs):
+                self._add_in_memory(chunk_id, Document(
+                    page_content=doc.page_content, metadata=doc.metadata, id=chunk_id
+                ))
+            self.store.set_many(
+                (chunk_id, json.dumps({'text': doc.page_content, 'metadata': doc.metadata},
+                                      ensure_ascii=False).encode('utf-8'))
+                for chunk_id, doc in zip(chunk_ids, docs)
+            )
+
+    def remove(self, chunk_ids: List[str]) -> None:
+        with self.lock:
+            for chunk_id in chunk_ids:
+                self._remove_in_memory(chunk_id)
+            self.store.delete_many(chunk_ids)
+
+    def documents_for(self, chunk_ids: Iterable[str]) -> Dict[str, Document]:
+        """Return the indexed chunks among the given ids."""
+        with self.lock:
+            return {chunk_id: self.documents[chunk_id] for chunk_id in chunk_ids if chunk_id in self.documents}
+
+    def missing(self, chunk_ids: Iterable[str]) -> List[str]:
+        """Return the given ids that are not in the index."""
+        with self.lock:
+            return [chunk_id for chunk_id in chunk_ids if chunk_id not in self.documents]
+
+    def _reset_in_memory(self) -> None:
+        self.documents = {}
+        self.doc_lengths = {}
+        self.postings = defaultdict(dict)
+        self.total_length = 0
+        if self.metadata_index is not None:
+            self.metadata_index.clear()
+
+    def reload(self) -> None:
+        """Rebuild the in-memory index from SQLite, picking up changes made by another process."""
+        with self.lock:
+            self._reset_in_memory()
+            self._load()
+
+    def clear(self) -> None:
+        with self.lock:
+            self._reset_in_memory()
+            self.store.clear()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, k: int = 3,
+               allowed: Optional[Collection[str]] = None) -> List[Tuple[Document, float]]:
+        """
+        Return the ``k`` best chunks for ``query`` by BM25 score, best first.
+
+        With ``allowed``, only those chunk ids are scored. Term statistics
+        still come from the whole corpus, so scores stay comparable.
+        """
+        terms = set(tokenize(query))
+        with self.lock:
+            n_docs = len(self.documents)
+            if not terms or not n_docs:
+                return []
+
+            avg_length = self.total_length / n_docs
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in postings.items():
+                    if allowed is not None and chunk_id not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(self.documents[chunk_id], score) for chunk_id, score in best]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                'chunks': len(self.documents),
+                'terms': len(self.postings),
+            }
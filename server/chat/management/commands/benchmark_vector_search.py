@@ -0,0 +1,95 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from chat.exact_index import QUANTIZATIONS, ExactIndex
+from chat.vector_service_new import vector_service
+
+
+def _recall(found, truth):
+    return np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, truth) if b])
+
+
+def _summary(timings):
+    timings = np.asarray(timings) * 1e6
+    return f"mean {timings.mean():8.1f}µs  p50 {np.percentile(timings, 50):8.1f}µs  p95 {np.percentile(timings, 95):8.1f}µs"
+
+
+class Command(BaseCommand):
+    help = ('Compare query latency of the in-memory exact index with the Chroma (HNSW) path, '
+            'and the recall and memory of its quantized forms')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=200, help='Number of queries to time')
+        parser.add_argument('--k', type=int, default=5, help='Results per query')
+        parser.add_argument(
+            '--noise',
+            type=float,
+            default=0.05,
+            help='Gaussian noise added to stored vectors to make the queries (no embedding API calls)',
+        )
+
+    def handle(self, *args, **options):
+        if not vector_service.load_existing_vectorstore():
+            raise CommandError('No usable vector store; run init_vectorstore first')
+
+        collection = vector_service.vectorstore._collection
+        vector_service.write_exact_index()
+        exact = ExactIndex.load(vector_service.exact_index_dir)
+        if exact is None or not len(exact):
+            raise CommandError('The vector store is empty')
+
+        k = options['k']
+        rng = np.random.default_rng(0)
+        rows = rng.integers(0, len(exact), size=options['queries'])
+        queries = np.asarray(exact.matrix[rows], dtype=np.float32)
+        queries += rng.normal(0, options['noise'], size=queries.shape).astype(np.float32)
+
+        self.stdout.write(f"{len(exact)} vectors of {exact.matrix.shape[1]} dimensions, "
+                          f"{exact.nbytes / 1e6:.1f} MB, k={k}, {len(queries)} queries")
+
+        chroma_timings, chroma_ids = [], []
+        for query in queries:
+            started = time.perf_counter()
+            found = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+            chroma_timings.append(time.perf_counter() - started)
+            chroma_ids.append(found['ids'][0])
+
+        exact_timings, exact_ids = [], []
+        for query in queries:
+            started = time.perf_counter()
+            hits = exact.search(query, k)
+            exact_timings.append(time.perf_counter() - started)
+            exact_ids.append([chunk_id for chunk_id, _ in hits])
+
+        started = time.perf_counter()
+        exact.search_many(queries, k)
+        batch_per_query = (time.perf_counter() - started) / len(queries)
+
+        # Exact search is the ground truth, so this is HNSW's recall
+        recall = _recall(chroma_ids, exact_ids)
+
+        self.stdout.write(f"chroma (hnsw):      {_summary(chroma_timings)}")
+        self.stdout.write(f"exact (numpy):      {_summary(exact_timings)}")
+        self.stdout.write(f"exact, batched:     {batch_per_query * 1e6:8.1f}µs per query")
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup {np.mean(chroma_timings) / np.mean(exact_timings):.1f}x, "
+                               f"chroma recall@{k} vs exact {recall:.3f}")
+        )
+
+        self.stdout.write(f"\nQuantized scans against the float32 index (recall@{k}):")
+        for quantization in QUANTIZATIONS[1:]:
+            for rescore_factor in (1, vector_service.exact_index_rescore_factor):
+                index = ExactIndex.load(vector_service.exact_index_dir, quantization=quantization,
+                                        rescore_factor=rescore_factor)
+                timings, found = [], []
+                for query in queries:
+                    started = time.perf_counter()
+                    hits = index.search(query, k)
+                    timings.append(time.perf_counter() - started)
+                    found.append([chunk_id for chunk_id, _ in hits])
+
+                self.stdout.write(
+                    f"{quantization:>8} rescore x{rescore_factor}: recall {_recall(found, exact_ids):.3f}  "
+                    f"scan {index.scan_bytes / 1e6:6.1f} MB of {index.nbytes / 1e6:.1f} MB  {_summary(timings)}"
+                )
@@ -1,4 +1,5 @@
 import logging
+import os
 from django.core.management.base import BaseCommand
 from server.chat.vector_service_new import vector_service
 
@@ -12,7 +13,25 @@ class Command(BaseCommand):
         parser.add_argument(
             '--force-recreate',
             action='store_true',
-            help='Force recreate the vector store even if it exists',
+            help='Sync the vector store with data/ even if it exists (only new or changed PDFs are re-indexed, '
+                 'unless EMBEDDING_BACKEND, CHUNK_SIZE or CHUNK_OVERLAP changed)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Drop the vector store and re-index every PDF, e.g. to repair it '
+                 '(unchanged chunks still come from the embedding cache)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue files left half-indexed by an interrupted run from their last stored batch',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of processes used to parse PDFs (defaults to VECTOR_LOAD_WORKERS or the CPU count)',
         )
 
     def handle(self, *args, **options):
@@ -20,10 +39,15 @@ class Command(BaseCommand):
             self.style.SUCCESS('Starting ChromaDB vector store initialization...')
         )
 
-        force_recreate = options.get('force_recreate', False)
+        resume = options.get('resume', False)
+        force_recreate = options.get('force_recreate', False) or resume
+        vector_service.load_workers = options.get('workers') or int(
+            os.getenv('VECTOR_LOAD_WORKERS', os.cpu_count() or 1)
+        )
         
         try:
-            success = vector_service.initialize(force_recreate=force_recreate)
+            success = vector_service.initialize(force_recreate=force_recreate, resume=resume,
+                                                full=options.get('full', False))
             
             if success:
                 self.stdout.write(
@@ -0,0 +1,44 @@
+import csv
+import json
+from django.core.management.base import BaseCommand, CommandError
+from chat.translation_service import translation_service
+
+
+class Command(BaseCommand):
+    help = 'Pre-seed the translation cache with known Nepali -> English phrases'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file',
+            nargs='?',
+            help='JSON object {"nepali": "english", ...} or two-column CSV (nepali,english)',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Only print translation cache statistics',
+        )
+
+    def handle(self, *args, **options):
+        if options.get('stats'):
+            for key, value in translation_service.cache_stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        path = options.get('file')
+        if not path:
+            raise CommandError('A JSON or CSV file of translations is required')
+
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                if path.endswith('.json'):
+                    pairs = list(json.load(fh).items())
+                else:
+                    pairs = [tuple(row[:2]) for row in csv.reader(fh) if len(row) >= 2]
+        except Exception as e:
+            raise CommandError(f'Could not read {path}: {str(e)}')
+
+        seeded = translation_service.seed_cache(pairs)
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Seeded {seeded} translations into the cache')
+        )
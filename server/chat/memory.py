@@ -0,0 +1,124 @@
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from .models import Chat
+from .resilience import get_breaker
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationMemory:
+    """
+    Rolling summary of older chat turns.
+
+    After a reply is saved, a background job folds messages that have
+    fallen out of the recent window into ``Chat.summary``. The prompt then
+    carries the summary plus only the turns after ``Chat.summarized_until``,
+    so its size stays roughly constant however long the chat runs.
+    """
+
+    def __init__(self):
+        """Initialize the summarizer with Google Gemini."""
+        api_key = os.getenv('GOOGLE_API_KEY')
+
+        if api_key:
+            self.llm = ChatGoogleGenerativeAI(
+                model="gemini-1.5-flash-002",
+                temperature=0.2,
+                google_api_key=api_key
+            )
+            self.is_available = True
+        else:
+            self.llm = None
+            self.is_available = False
+            logger.warning("No GOOGLE_API_KEY found. Conversation summaries will be disabled.")
+
+        # A hung call must not hold one of the two summary threads forever
+        self.breaker = get_breaker('summary')
+        self.timeout = float(os.getenv('CHAT_SUMMARY_TIMEOUT', 30))
+
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='chat-summary')
+        self.in_progress = set()
+        self.lock = threading.Lock()
+
+    def schedule_refresh(self, chat_id: str) -> None:
+        """Queue a summary refresh for a chat unless one is already running."""
+        if not self.is_available:
+            return
+
+        with self.lock:
+            if chat_id in self.in_progress:
+                return
+            self.in_progress.add(chat_id)
+
+        self.executor.submit(self._run_refresh, chat_id)
+
+    def _run_refresh(self, chat_id: str) -> None:
+        try:
+            close_old_connections()
+            self.refresh(chat_id)
+        except Exception as e:
+            logger.error(f"Summary refresh failed for chat {chat_id}: {str(e)}")
+        finally:
+            close_old_connections()
+            with self.lock:
+                self.in_progress.discard(chat_id)
+
+    def refresh(self, chat_id: str) -> bool:
+        """
+        Fold unsummarized messages older than the recent window into the summary.
+
+        Does nothing until at least ``CHAT_SUMMARY_EVERY`` such messages
+        have accumulated. Returns True if the summary was updated.
+        """
+        chat = Chat.objects.get(chat_id=chat_id)
+
+        pending = chat.messages.all()
+        if chat.summarized_until:
+            pending = pending.filter(created_at__gt=chat.summarized_until)
+
+        foldable = pending.count() - settings.CHAT_RECENT_MESSAGES
+        if foldable < settings.CHAT_SUMMARY_EVERY:
+            return False
+
+        # Bound the size of a single summarization call
+        to_fold = list(pending.order_by('created_at')[:min(foldable, 50)])
+
+        transcript = "\n".join(
+            f"{'Farmer' if msg.role == 'user' else 'Krishi Sathi'}: {msg.message}"
+            for msg in to_fold
+        )
+        prompt = f"""You maintain a running summary of a conversation between a Nepali farmer and the assistant Krishi Sathi.
+Update the summary with the new messages. Keep every fact that matters for future advice: crops, symptoms,
+chemicals or pesticides used and when, dates, quantities, location, and advice already given.
+Write in Nepali, at most 150 words. Only output the updated summary.
+
+Current summary:
+{chat.summary or '(none)'}
+
+New messages:
+{transcript}
+
+Updated summary:"""
+
+        response = self.breaker.call(self.llm.invoke, prompt, timeout=self.timeout)
+        summary = response.content.strip()
+        if not summary:
+            return False
+
+        Chat.objects.filter(chat_id=chat_id).update(
+            summary=summary,
+            summarized_until=to_fold[-1].created_at
+        )
+        logger.info(f"Folded {len(to_fold)} messages into the summary of chat {chat_id}")
+        return True
+
+
+# Global instance
+conversation_memory = ConversationMemory()
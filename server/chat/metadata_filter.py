@@ -0,0 +1,217 @@
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .lexical_index import tokenize
+
+# Tag -> words that mark a chunk as being about it. Matched against the
+# chunk's search terms at ingest time, so edits only apply to newly
+# indexed chunks (and to chunks stored without tags).
+TAG_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    # Crops and foods
+    'rice': ('rice', 'paddy', 'धान', 'चामल'),
+    'maize': ('maize', 'corn', 'मकै'),
+    'wheat': ('wheat', 'flour', 'गहुँ'),
+    'potato': ('potato', 'potatoes', 'आलु'),
+    'tomato': ('tomato', 'tomatoes', 'गोलभेडा'),
+    'vegetables': ('vegetable', 'vegetables', 'cabbage', 'cauliflower', 'spinach', 'तरकारी'),
+    'fruit': ('fruit', 'fruits', 'mango', 'banana', 'apple', 'फलफूल'),
+    'dairy': ('milk', 'dairy', 'cheese', 'curd', 'ghee', 'दूध'),
+    'meat': ('meat', 'poultry', 'chicken', 'fish', 'egg', 'eggs', 'मासु'),
+    # Topics
+    'pesticides': ('pesticide', 'pesticides', 'insecticide', 'insecticides', 'fungicide', 'herbicide',
+                   'residue', 'residues', 'mrl', 'spray', 'spraying', 'विषादी'),
+    'mycotoxins': ('aflatoxin', 'aflatoxins', 'mycotoxin', 'mycotoxins', 'mould', 'mold'),
+    'storage': ('storage', 'store', 'stored', 'warehouse', 'moisture', 'drying', 'भण्डारण'),
+    'hygiene': ('hygiene', 'sanitation', 'contamination', 'bacteria', 'microbial', 'washing', 'सरसफाइ'),
+    'nutrition': ('nutrition', 'nutrient', 'nutrients', 'vitamin', 'vitamins', 'protein', 'diet', 'पोषण'),
+    'adulteration': ('adulteration', 'adulterant', 'adulterated', 'मिसावट'),
+    'regulation': ('act', 'regulation', 'regulations', 'standard', 'standards', 'codex', 'license'),
+}
+
+_TAGS_BY_KEYWORD: Dict[str, Set[str]] = defaultdict(set)
+for _tag, _keywords in TAG_KEYWORDS.items():
+    for _keyword in _keywords:
+        _TAGS_BY_KEYWORD[_keyword].add(_tag)
+
+
+def tag_text(text: str) -> List[str]:
+    """Return the sorted tags whose keywords occur in ``text``."""
+    tags = set()
+    for term in set(tokenize(text)):
+        tags.update(_TAGS_BY_KEYWORD.get(term, ()))
+    return sorted(tags)
+
+
+def tags_value(tags: Iterable[str]) -> str:
+    """Tags as stored in chunk metadata."""
+    return ','.join(tags)
+
+
+def chunk_tags(doc_text: str, metadata: Mapping[str, Any]) -> List[str]:
+    """
+    Tags of a stored chunk.
+
+    Chroma metadata values must be scalars, so tags are stored as a
+    comma-separated string; chunks indexed before tagging existed are
+    tagged from their text.
+    """
+    tags = metadata.get('tags')
+    if tags is None:
+        return tag_text(doc_text)
+    return [tag for tag in tags.split(',') if tag]
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Restriction of a search to some chunks.
+
+    Chunks must come from one of ``sources`` (PDF file names), have a
+    ``page`` metadata value within ``page_from``..``page_to`` (inclusive,
+    numbered as in search results) and carry every one of ``tags``.
+    Unset fields don't restrict.
+    """
+    sources: Tuple[str, ...] = ()
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    tags: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Optional['SearchFilter']:
+        """
+        Parse the ``source``, ``page_from``, ``page_to`` and ``tags`` fields of a request.
+
+        ``source`` and ``tags`` may be a string or a list of strings.
+        Returns None when no field is set; raises ValueError on bad input.
+        """
+        def strings(name):
+            value = data.get(name)
+            if value is None:
+                return ()
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list) or not all(isinstance(item, str) and item for item in value):
+                raise ValueError(f"{name} must be a string or a list of strings")
+            return tuple(value)
+
+        def page(name):
+            value = data.get(name)
+            if value is None:
+                return None
+            if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                raise ValueError(f"{name} must be a non-negative integer")
+            return value
+
+        search_filter = cls(
+            sources=strings('source'),
+            page_from=page('page_from'),
+            page_to=page('page_to'),
+            tags=strings('tags'),
+        )
+        unknown = [tag for tag in search_filter.tags if tag not in TAG_KEYWORDS]
+        if unknown:
+            raise ValueError(f"Unknown tags: {', '.join(unknown)}. Known tags: {', '.join(TAG_KEYWORDS)}")
+        if (search_filter.page_from is not None and search_filter.page_to is not None
+                and search_filter.page_from > search_filter.page_to):
+            raise ValueError("page_from must not be greater than page_to")
+        return None if search_filter.is_empty() else search_filter
+
+    def is_empty(self) -> bool:
+        return not self.sources and not self.tags and self.page_from is None and self.page_to is None
+
+    def chroma_where(self) -> Optional[Dict[str, Any]]:
+        """The source and page part of the filter as a Chroma ``where`` clause, or None."""
+        clauses = []
+        if self.sources:
+            clauses.append({'source': {'$in': list(self.sources)}})
+        if self.page_from is not None:
+            clauses.append({'page': {'$gte': self.page_from}})
+        if self.page_to is not None:
+            clauses.append({'page': {'$lte': self.page_to}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+class MetadataIndex:
+    """
+    Postings from source, page and tag to chunk ids.
+
+    Lets a filter be resolved to the set of allowed chunks up front, so
+    searches score only those instead of filtering results afterwards.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.by_source: Dict[str, Set[str]] = defaultdict(set)
+        self.by_page: Dict[int, Set[str]] = defaultdict(set)
+        self.by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self.keys: Dict[str, Tuple[Optional[str], Optional[int], List[str]]] = {}
+
+    def add(self, chunk_id: str, text: str, metadata: Mapping[str, Any]) -> None:
+        with self.lock:
+            self.remove(chunk_id)
+            source = metadata.get('source')
+            page = metadata.get('page')
+            page = page if isinstance(page, int) else None
+            tags = chunk_tags(text, metadata)
+
+            if source is not None:
+                self.by_source[source].add(chunk_id)
+            if page is not None:
+                self.by_page[page].add(chunk_id)
+            for tag in tags:
+                self.by_tag[tag].add(chunk_id)
+            self.keys[chunk_id] = (source, page, tags)
+
+    def remove(self, chunk_id: str) -> None:
+        with self.lock:
+            keys = self.keys.pop(chunk_id, None)
+            if keys is None:
+                return
+            source, page, tags = keys
+            postings = [(self.by_source, source), (self.by_page, page)] + [(self.by_tag, tag) for tag in tags]
+            for index, key in postings:
+                if key is not None and key in index:
+                    index[key].discard(chunk_id)
+                    if not index[key]:
+                        del index[key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.by_source.clear()
+            self.by_page.clear()
+            self.by_tag.clear()
+            self.keys.clear()
+
+    def allowed(self, search_filter: SearchFilter) -> Set[str]:
+        """Ids of the chunks that pass the filter."""
+        with self.lock:
+            candidates: List[Set[str]] = []
+            if search_filter.sources:
+                candidates.append(set().union(*(self.by_source.get(source, ()) for source in search_filter.sources)))
+            if search_filter.page_from is not None or search_filter.page_to is not None:
+                low = search_filter.page_from if search_filter.page_from is not None else 0
+                high = search_filter.page_to if search_filter.page_to is not None else float('inf')
+                candidates.append(set().union(*(ids for page, ids in self.by_page.items() if low <= page <= high)))
+            for tag in search_filter.tags:
+                candidates.append(self.by_tag.get(tag, set()))
+
+            if not candidates:
+                return set(self.keys)
+            # Intersect starting from the smallest set
+            candidates.sort(key=len)
+            allowed = set(candidates[0])
+            for ids in candidates[1:]:
+                allowed &= ids
+            return allowed
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'sources': len(self.by_source),
+                'pages': len(self.by_page),
+                'tags': {tag: len(ids) for tag, ids in sorted(self.by_tag.items())},
+            }
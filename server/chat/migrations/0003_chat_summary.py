@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-17 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_message_chat_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='summarized_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -4,6 +4,9 @@ import uuid
 
 class Chat(models.Model):
     chat_id = models.CharField(max_length=255, primary_key=True, default=uuid.uuid4, editable=False)
+    # Rolling summary of messages up to and including summarized_until
+    summary = models.TextField(blank=True, default='')
+    summarized_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -27,3 +30,7 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Serves "latest N messages of a chat" without scanning the chat
+            models.Index(fields=['chat', 'created_at'], name='chat_msg_chat_created_idx'),
+        ]
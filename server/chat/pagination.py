@@ -0,0 +1,75 @@
+import base64
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+
+
+def encode_cursor(message) -> str:
+    """Opaque cursor for a message's position in (created_at, message_id) order."""
+    raw = f"{message.created_at.isoformat()}|{message.message_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor from encode_cursor; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, message_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), message_id
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def parse_page_size(value: Optional[str]) -> int:
+    """Clamp a requested page size to 1..CHAT_MESSAGES_MAX_PAGE_SIZE."""
+    if value in (None, ''):
+        return settings.CHAT_MESSAGES_PAGE_SIZE
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('page_size must be an integer')
+    return max(1, min(page_size, settings.CHAT_MESSAGES_MAX_PAGE_SIZE))
+
+
+def paginate_messages(queryset, page_size: int, before: Optional[str] = None,
+                      since: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Keyset-paginate messages over (created_at, message_id).
+
+    - ``before``: the page of messages just older than the cursor
+    - ``since``: the page of messages just newer than the cursor
+    - neither: the newest page
+
+    Messages in a page are always returned oldest first. Only
+    ``page_size + 1`` rows are read, whatever the size of the chat.
+    """
+    if before and since:
+        raise ValueError('Use either before or since, not both')
+
+    if since:
+        created_at, message_id = decode_cursor(since)
+        rows = list(queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, message_id__gt=message_id)
+        ).order_by('created_at', 'message_id')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+    else:
+        if before:
+            created_at, message_id = decode_cursor(before)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, message_id__lt=message_id)
+            )
+        rows = list(queryset.order_by('-created_at', '-message_id')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        rows.reverse()
+
+    return {
+        'messages': rows,
+        'has_more': has_more,
+        # Cursors to continue in either direction from this page
+        'before': encode_cursor(rows[0]) if rows else before,
+        'since': encode_cursor(rows[-1]) if rows else since,
+    }
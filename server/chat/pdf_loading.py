@@ -0,0 +1,39 @@
+import logging
+import time
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+
+def load_pdf(pdf_path: str) -> Tuple[List[Document], float]:
+    """
+    Parse one PDF into page documents.
+
+    Runs in spawned loader processes, which import only this module
+    rather than vector_service_new and its global VectorService.
+    Returns the pages and the time spent parsing, in seconds.
+    """
+    started = time.perf_counter()
+    docs = PyPDFLoader(pdf_path).load()
+
+    # Add source metadata
+    name = Path(pdf_path).name
+    for doc in docs:
+        doc.metadata['source'] = name
+
+    return docs, time.perf_counter() - started
+
+
+def iter_pdf_pages(pdf_file: Path) -> Iterator[Document]:
+    """Parse one PDF lazily, yielding a page at a time."""
+    started = time.perf_counter()
+    pages = 0
+    for doc in PyPDFLoader(str(pdf_file)).lazy_load():
+        doc.metadata['source'] = pdf_file.name
+        pages += 1
+        yield doc
+    logger.info(f"Loaded {pages} pages from {pdf_file.name} in {time.perf_counter() - started:.2f}s")
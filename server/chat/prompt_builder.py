@@ -0,0 +1,158 @@
+import math
+import re
+import logging
+from typing import List, Dict, Any
+
+from django.conf import settings
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate the model's token count without calling the API.
+
+    Latin-script words cost roughly one token per four characters; other
+    scripts (Devanagari) tokenize much finer, so they are counted at one
+    token per two characters. Punctuation is one token each.
+    """
+    if not text:
+        return 0
+
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        if piece.isascii():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += math.ceil(len(piece) / 2)
+    return tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly ``max_tokens``, preferring a sentence or line boundary."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    # Binary search the longest prefix that fits
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+
+    cut = text[:low]
+    boundary = max(cut.rfind('\n'), cut.rfind('. '), cut.rfind('।'))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " …"
+
+
+class PromptBudget:
+    """
+    Fit prompt sections into per-section token budgets and an overall target.
+
+    Sections, from most to least protected: persona (fixed), current
+    message (fixed), conversation summary, RAG chunks (kept in rank order),
+    history (newest kept first) and web search context.
+    """
+
+    def __init__(self, persona_tokens: int):
+        self.persona_tokens = persona_tokens
+        self.target = settings.PROMPT_TOKEN_TARGET
+        self.budgets = {
+            'summary': settings.PROMPT_BUDGET_SUMMARY,
+            'rag': settings.PROMPT_BUDGET_RAG,
+            'web': settings.PROMPT_BUDGET_WEB,
+            'history': settings.PROMPT_BUDGET_HISTORY,
+        }
+
+    def _fit_docs(self, docs: List[Document], budget: int) -> List[Document]:
+        fitted = []
+        used = 0
+        for doc in docs:
+            tokens = count_tokens(doc.page_content)
+            if used + tokens <= budget:
+                fitted.append(doc)
+                used += tokens
+                continue
+
+            # Keep a trimmed part of the next chunk if a useful amount fits
+            remaining = budget - used
+            if remaining >= 100:
+                fitted.append(Document(
+                    page_content=truncate_to_tokens(doc.page_content, remaining),
+                    metadata=doc.metadata
+                ))
+            break
+        return fitted
+
+    @staticmethod
+    def _fit_history(history: List[Dict[str, Any]], budget: int) -> List[Dict[str, Any]]:
+        fitted = []
+        used = 0
+        for msg in reversed(history):
+            tokens = count_tokens(msg['message'])
+            if used + tokens > budget:
+                break
+            fitted.append(msg)
+            used += tokens
+        fitted.reverse()
+        return fitted
+
+    def fit(self, message: str, docs: List[Document], web_context: str,
+            history: List[Dict[str, Any]], summary: str = "") -> Dict[str, Any]:
+        """
+        Trim every section to its budget, then drop lower-value content until
+        the whole prompt fits the target.
+
+        Returns a dict with the fitted ``docs``, ``web_context``, ``history``
+        and ``summary`` plus a ``tokens`` breakdown.
+        """
+        summary = truncate_to_tokens(summary, self.budgets['summary'])
+        docs = self._fit_docs(docs or [], self.budgets['rag'])
+        web_context = truncate_to_tokens(web_context or "", self.budgets['web'])
+        history = self._fit_history(history or [], self.budgets['history'])
+
+        def totals():
+            return {
+                'persona': self.persona_tokens,
+                'message': count_tokens(message),
+                'summary': count_tokens(summary),
+                'rag': sum(count_tokens(doc.page_content) for doc in docs),
+                'web': count_tokens(web_context),
+                'history': sum(count_tokens(msg['message']) for msg in history),
+            }
+
+        tokens = totals()
+        overflow = sum(tokens.values()) - self.target
+        if overflow > 0:
+            # Lowest value first: web results, then the oldest history, then the
+            # lowest-ranked chunks
+            web_context = truncate_to_tokens(web_context, tokens['web'] - overflow)
+            tokens = totals()
+            while sum(tokens.values()) > self.target and history:
+                history = history[1:]
+                tokens = totals()
+            while sum(tokens.values()) > self.target and len(docs) > 1:
+                docs = docs[:-1]
+                tokens = totals()
+
+        total = sum(tokens.values())
+        if total > self.target:
+            logger.warning(f"Prompt is {total} tokens, over the {self.target} token target")
+        logger.debug(f"Prompt token budget: {tokens} (total {total})")
+
+        return {
+            'docs': docs,
+            'web_context': web_context,
+            'history': history,
+            'summary': summary,
+            'tokens': tokens,
+        }
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from .translation_service import TranslationService, translation_service
+
+logger = logging.getLogger(__name__)
+
+
+class TurnContext:
+    """
+    State shared by everything that handles one chat turn.
+
+    Detects the message language once and translates it at most once, so
+    the vector search and web search reuse the same translation instead of
+    each calling the LLM.
+    """
+
+    def __init__(self, message: str, translator: Optional[TranslationService] = None):
+        self.message = message
+        self.translator = translator or translation_service
+        self.language = self.translator.detect_language(message)
+        self._translated_query: Optional[str] = None
+        # The vector and web searches may ask for the translation concurrently
+        self._lock = threading.Lock()
+        self._translation_task: Optional[asyncio.Future] = None
+
+    @property
+    def translated_query(self) -> str:
+        """The message in English, translated on first access."""
+        with self._lock:
+            if self._translated_query is None:
+                if self.language == 'nepali':
+                    self._translated_query = self.translator.translate_query_for_rag(self.message)
+                else:
+                    self._translated_query = self.message
+            return self._translated_query
+
+    async def atranslated_query(self) -> str:
+        """Async counterpart of ``translated_query``; concurrent awaiters share one LLM call."""
+        if self._translated_query is not None:
+            return self._translated_query
+        if self.language != 'nepali':
+            self._translated_query = self.message
+            return self._translated_query
+
+        if self._translation_task is None:
+            self._translation_task = asyncio.ensure_future(
+                self.translator.atranslate_query_for_rag(self.message)
+            )
+        # Shielded: one awaiter timing out must not cancel the task the others wait on
+        self._translated_query = await asyncio.shield(self._translation_task)
+        return self._translated_query
@@ -0,0 +1,73 @@
+import logging
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+RERANK_METHODS = ('none', 'mmr', 'cross-encoder')
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr(query_vector: Sequence[float], doc_vectors: Sequence[Sequence[float]], k: int,
+        lambda_mult: float = 0.5) -> List[int]:
+    """
+    Pick ``k`` documents by maximal marginal relevance.
+
+    Each step takes the candidate maximizing
+    ``lambda_mult * sim(query, doc) - (1 - lambda_mult) * max sim(doc, selected)``,
+    so near-duplicates of chunks already picked lose out to chunks that add
+    something new. All similarities come from two matrix products up front.
+
+    Returns indexes into ``doc_vectors`` in selection order.
+    """
+    docs = _unit_rows(np.asarray(doc_vectors, dtype=np.float32))
+    if len(docs) == 0 or k <= 0:
+        return []
+    query = _unit_rows(np.asarray(query_vector, dtype=np.float32))
+
+    relevance = docs @ query
+    similarity = docs @ docs.T
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    taken = np.zeros(len(docs), dtype=bool)
+    taken[first] = True
+    redundancy = similarity[first].copy()
+
+    while len(selected) < min(k, len(docs)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[taken] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        taken[best] = True
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
+
+
+class CrossEncoderReranker:
+    """Re-score (query, chunk) pairs with a local sentence-transformers cross-encoder."""
+
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError("Cross-encoder re-ranking needs the sentence-transformers package") from e
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, device='cpu')
+
+    def rerank(self, query: str, results: List[Tuple[Document, float]], k: int) -> List[Tuple[Document, float]]:
+        """Return the ``k`` best results with the cross-encoder's scores."""
+        if not results:
+            return []
+        scores = self.model.predict([(query, doc.page_content) for doc, _ in results])
+        order = np.argsort(-np.asarray(scores))[:k]
+        return [(results[i][0], float(scores[i])) for i in order]
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for an external dependency.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately with CircuitOpenError. Once ``reset_timeout``
+    seconds have passed a single probe call is let through: success closes
+    the circuit again, failure re-opens it for another ``reset_timeout``.
+    A probe that is abandoned (cancelled, or a stream closed early) lets
+    the next call probe instead.
+
+    Timed calls run in the breaker's own thread pool, so a dependency
+    with long or hung calls can't delay another one's.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # A call that times out keeps its thread until the underlying
+        # client gives up, so leave some headroom.
+        with self.lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('RESILIENCE_WORKERS', 16)),
+                    thread_name_prefix=f"resilience-{self.name}"
+                )
+            return self._executor
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected; has no side effects."""
+        with self.lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            # A half-open probe with no outcome after reset_timeout is
+            # treated as lost, so another one may go
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let exactly one probe through
+                self.state = self.HALF_OPEN
+                self.opened_at = time.monotonic()
+                logger.info(f"Circuit '{self.name}' half-open, probing")
+                return
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def record_abandoned(self) -> None:
+        """The call ended without an outcome; if it was the probe, let the next call probe."""
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic() - self.reset_timeout
+
+    def call(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Call ``fn`` through the breaker, optionally with a timeout in seconds.
+
+        Raises CircuitOpenError without calling ``fn`` while the circuit is
+        open, TimeoutError if the call overruns, or whatever ``fn`` raised.
+        """
+        self.before_call()
+        try:
+            if timeout is None:
+                result = fn(*args, **kwargs)
+            else:
+                future = self.executor.submit(fn, *args, **kwargs)
+                try:
+                    result = future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    future.cancel()
+                    raise TimeoutError(f"'{self.name}' call timed out after {timeout}s")
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.record_abandoned()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Async version of call for coroutine functions."""
+        self.before_call()
+        try:
+            if timeout is None:
+                result = await fn(*args, **kwargs)
+            else:
+                result = await asyncio.wait_for(fn(*args, **kwargs), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.record_failure()
+            raise TimeoutError(f"'{self.name}' call timed out after {timeout}s")
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled, e.g. by an outer wait_for
+            self.record_abandoned()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a dependency, creating it on first use."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+                reset_timeout=float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30))
+            )
+        return _breakers[name]
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
@@ -1,8 +1,13 @@
+import asyncio
 import os
 import logging
-from typing import List, Dict, Any
-from langchain_community.tools import DuckDuckGoSearchRun
-from .translation_service import TranslationService
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse
+from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+from .cache_store import LRUCache, normalize_text
+from .request_context import TurnContext
+from .resilience import get_breaker
+from .translation_service import translation_service
 
 logger = logging.getLogger(__name__)
 
@@ -10,26 +15,42 @@ logger = logging.getLogger(__name__)
 class SearchService:
     def __init__(self):
         """Initialize the search service with DuckDuckGo Search."""
-        self.translation_service = TranslationService()
+        self.translation_service = translation_service
+
+        # Enhanced query -> list of normalized snippets
+        self.cache = LRUCache(
+            max_entries=int(os.getenv('SEARCH_CACHE_SIZE', 1024)),
+            ttl=float(os.getenv('SEARCH_CACHE_TTL', 6 * 3600))
+        )
+        self.max_results = int(os.getenv('SEARCH_MAX_RESULTS', 5))
+        self.snippet_chars = int(os.getenv('SEARCH_SNIPPET_CHARS', 300))
+
+        # While DuckDuckGo keeps failing, answer without web context
+        self.breaker = get_breaker('web_search')
+        self.timeout = float(os.getenv('SEARCH_TIMEOUT', 4))
         
         try:
             # DuckDuckGo doesn't require API key
-            self.search_tool = DuckDuckGoSearchRun()
-            self.is_available = True
+            self.search_tool = DuckDuckGoSearchAPIWrapper(max_results=self.max_results)
             logger.info("DuckDuckGo Search service initialized successfully")
         except Exception as e:
             self.search_tool = None
-            self.is_available = False
             logger.warning(f"Failed to initialize DuckDuckGo Search: {e}")    
             
+    @property
+    def is_available(self) -> bool:
+        """False if the client failed to initialize or its circuit is open."""
+        return self.search_tool is not None and not self.breaker.is_open()
             
-    def search_farming_solutions(self, query: str, language: str = None) -> str:
+    def search_farming_solutions(self, query: str, language: str = None,
+                                 turn: Optional[TurnContext] = None) -> str:
         """
         Search for practical farming solutions using DuckDuckGo Search.
         
         Args:
             query: The user's query
             language: Detected language ('nepali' or 'english')
+            turn: Context of the current chat turn; its translation is reused
             
         Returns:
             Formatted search results as context string
@@ -41,22 +62,25 @@ class SearchService:
         try:
             # Detect language if not provided
             if language is None:
-                language = self.translation_service.detect_language(query)
+                language = turn.language if turn is not None else self.translation_service.detect_language(query)
             
             # Translate Nepali query to English for better search results
             search_query = query
             if language == 'nepali':
-                search_query = self.translation_service.translate_to_english(query)
+                if turn is not None and turn.message == query:
+                    search_query = turn.translated_query
+                else:
+                    search_query = self.translation_service.translate_to_english(query)
                 logger.info(f"Translated query: {query} -> {search_query}")
             
             # Enhance search query with farming context
             enhanced_query = self._enhance_farming_query(search_query)
             
-            # Perform search using DuckDuckGo
-            search_results = self.search_tool.run(enhanced_query)
+            # Perform search using DuckDuckGo (or reuse a recent result)
+            snippets = self.get_snippets(enhanced_query)
             
             # Format results for LLM context
-            formatted_results = self._format_search_results(search_results, query)
+            formatted_results = self._format_search_results(snippets, query)
             
             logger.info(f"Search completed for query: {enhanced_query}")
             return formatted_results
@@ -65,6 +89,90 @@ class SearchService:
             logger.error(f"Search error: {e}")
             return ""
 
+    async def asearch_farming_solutions(self, query: str, language: str = None,
+                                        turn: Optional[TurnContext] = None) -> str:
+        """
+        Async version of search_farming_solutions.
+
+        The translation is awaited; the DuckDuckGo client is synchronous and
+        runs in a worker thread.
+        """
+        if not self.is_available:
+            logger.warning("Search service not available")
+            return ""
+
+        try:
+            if language is None:
+                language = turn.language if turn is not None else self.translation_service.detect_language(query)
+
+            search_query = query
+            if language == 'nepali':
+                if turn is not None and turn.message == query:
+                    search_query = await turn.atranslated_query()
+                else:
+                    search_query = await self.translation_service.atranslate_to_english(query)
+                logger.info(f"Translated query: {query} -> {search_query}")
+
+            enhanced_query = self._enhance_farming_query(search_query)
+            snippets = await asyncio.to_thread(self.get_snippets, enhanced_query)
+            formatted_results = self._format_search_results(snippets, query)
+
+            logger.info(f"Search completed for query: {enhanced_query}")
+            return formatted_results
+
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            return ""
+
+    def get_snippets(self, enhanced_query: str) -> List[Dict[str, str]]:
+        """
+        Search DuckDuckGo and return deduplicated, truncated snippets.
+
+        Results are cached per normalized query for SEARCH_CACHE_TTL seconds.
+        """
+        cache_key = normalize_text(enhanced_query)
+        snippets = self.cache.get(cache_key)
+        if snippets is not None:
+            logger.info(f"Search cache hit for query: {enhanced_query}")
+            return snippets
+
+        raw_results = self.breaker.call(
+            self.search_tool.results, enhanced_query, max_results=self.max_results, timeout=self.timeout
+        )
+        snippets = self._normalize_results(raw_results)
+        self.cache.set(cache_key, snippets)
+        return snippets
+
+    def _normalize_results(self, raw_results: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Turn raw DuckDuckGo results into unique ``{title, url, text}`` snippets."""
+        snippets = []
+        seen_urls = set()
+        seen_texts = set()
+
+        for result in raw_results or []:
+            url = (result.get('link') or '').strip()
+            text = ' '.join((result.get('snippet') or '').split())
+            if not text:
+                continue
+
+            # Same page, or the same text syndicated on another site
+            text_key = normalize_text(text)[:120]
+            if (url and url in seen_urls) or text_key in seen_texts:
+                continue
+            seen_urls.add(url)
+            seen_texts.add(text_key)
+
+            if len(text) > self.snippet_chars:
+                text = text[:self.snippet_chars].rsplit(' ', 1)[0] + ' …'
+
+            snippets.append({
+                'title': ' '.join((result.get('title') or '').split()),
+                'url': url,
+                'text': text,
+            })
+
+        return snippets
+
     def _enhance_farming_query(self, query: str) -> str:
         """
         Enhance the search query with farming and Nepal-specific context.
@@ -88,16 +196,22 @@ class SearchService:
         
         return enhanced_query
 
-    def _format_search_results(self, search_results: str, original_query: str) -> str:
+    def _format_search_results(self, snippets: List[Dict[str, str]], original_query: str) -> str:
         """
-        Format search results for inclusion in LLM context.
+        Format search snippets for inclusion in LLM context.
         """
-        if not search_results:
+        if not snippets:
             return ""
         
         try:
-            # Parse search results (they come as a string)
-            results_text = search_results
+            lines = []
+            for snippet in snippets:
+                # The domain is enough for the model to judge the source
+                domain = urlparse(snippet['url']).netloc if snippet['url'] else ''
+                source = f" ({domain})" if domain else ''
+                title = f"{snippet['title']}: " if snippet['title'] else ''
+                lines.append(f"- {title}{snippet['text']}{source}")
+            results_text = "\n".join(lines)
             
             # Format for context
             formatted_context = f"""
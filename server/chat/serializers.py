@@ -18,6 +18,15 @@ class ChatSerializer(serializers.ModelSerializer):
         read_only_fields = ['chat_id', 'created_at', 'updated_at']
 
 
+class ChatSummarySerializer(serializers.ModelSerializer):
+    """Chat without nested messages; fetch those page by page instead."""
+
+    class Meta:
+        model = Chat
+        fields = ['chat_id', 'created_at', 'updated_at']
+        read_only_fields = ['chat_id', 'created_at', 'updated_at']
+
+
 class CreateMessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
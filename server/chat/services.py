@@ -1,11 +1,30 @@
+import asyncio
 import os
-from typing import List, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Iterator, Tuple
 
-from langchain.schema import HumanMessage, AIMessage, SystemMessage
+from django.conf import settings
+from langchain.schema import HumanMessage, AIMessage, SystemMessage, Document
 from langchain_google_genai import ChatGoogleGenerativeAI
 from .vector_service_new import vector_service
 from .search_service import search_service
-from .translation_service import TranslationService
+from .answer_cache import answer_cache
+from .prompt_builder import PromptBudget, count_tokens
+from .request_context import TurnContext
+from .resilience import CircuitOpenError, get_breaker
+from .translation_service import translation_service
+
+
+# Returned instead of an error while the model's circuit is open
+UNAVAILABLE_MESSAGE = "माफ गर्नुहोस्, उत्तर दिने सेवा अहिले अस्थायी रूपमा उपलब्ध छैन। कृपया केही बेरपछि फेरि प्रयास गर्नुहोस्।"
+
+# Shared pool for fetching RAG and web context concurrently. A source that
+# misses its deadline is abandoned, so the pool is sized with headroom.
+_context_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('CONTEXT_FETCH_WORKERS', 16)),
+    thread_name_prefix='chat-context'
+)
 
 
 class ChatService:
@@ -13,8 +32,8 @@ class ChatService:
         # Load Google API Key from environment
         api_key = os.getenv('GOOGLE_API_KEY')
         
-        # Initialize translation service
-        self.translation_service = TranslationService()
+        # Shared translation service (and its cache)
+        self.translation_service = translation_service
 
         if api_key:
             # Initialize Gemini model (Google Generative AI)
@@ -29,6 +48,57 @@ class ChatService:
             self.llm = None
             self.provider = "mock"
 
+        # Per-source deadlines (seconds) for gathering prompt context
+        self.rag_timeout = float(os.getenv('RAG_TIMEOUT', 8))
+        self.web_search_timeout = float(os.getenv('WEB_SEARCH_TIMEOUT', 5))
+
+        # Candidate chunks fetched per turn; the prompt budget decides how many fit
+        self.rag_max_docs = int(os.getenv('RAG_MAX_DOCS', 3))
+        self.answer_cache_enabled = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+
+        # Stop sending requests to the model while it keeps failing
+        self.llm_breaker = get_breaker('chat_llm')
+        self.llm_timeout = float(os.getenv('CHAT_LLM_TIMEOUT', 60))
+        # Streams give up if the first chunk or any later one is this late
+        self.stream_first_chunk_timeout = float(os.getenv('CHAT_STREAM_FIRST_CHUNK_TIMEOUT', 30))
+        self.stream_chunk_timeout = float(os.getenv('CHAT_STREAM_CHUNK_TIMEOUT', 15))
+        self.prompt_budget = PromptBudget(persona_tokens=count_tokens(self.get_system_prompt()))
+
+    def _fetch_search_context(self, message: str, turn: TurnContext) -> str:
+        if not search_service.is_available:
+            return ""
+        return search_service.search_farming_solutions(message, turn.language, turn=turn)
+
+    def gather_context(self, message: str, turn: TurnContext) -> Tuple[List[Document], str]:
+        """
+        Fetch relevant document chunks and web search context concurrently.
+
+        Each source has its own deadline; one that fails or runs late is
+        dropped so it never holds up the LLM call.
+        """
+        started = time.monotonic()
+        sources = {
+            'vector': (_context_executor.submit(vector_service.similarity_search, message, self.rag_max_docs, turn),
+                       self.rag_timeout, []),
+            'search': (_context_executor.submit(self._fetch_search_context, message, turn),
+                       self.web_search_timeout, ""),
+        }
+
+        results = {}
+        for name, (future, timeout, default) in sources.items():
+            remaining = max(0.0, timeout - (time.monotonic() - started))
+            try:
+                results[name] = future.result(timeout=remaining) or default
+            except FutureTimeoutError:
+                print(f"{name} context timed out after {timeout}s, continuing without it")
+                future.cancel()
+                results[name] = default
+            except Exception as e:
+                print(f"{name} context error: {e}")
+                results[name] = default
+
+        return results['vector'], results['search']
+
     def get_system_prompt(self, context: str = "", search_context: str = "") -> str:
         """
         Return the enhanced system prompt defining AI behavior and tone.
@@ -181,57 +251,248 @@ Krishi Sathi:
         
         return base_prompt
 
-    def get_chat_response(self, message: str, chat_history: List[Dict[str, Any]] = None) -> str:
+    def build_messages(self, message: str, chat_history: List[Dict[str, Any]] = None,
+                       summary: str = "", turn: TurnContext = None) -> list:
+        """
+        Build the full message list for the model: system prompt with document
+        and search context, recent chat history and the current user message.
+        """
+        # Detect language once; the translation is done at most once
+        # and shared by the vector and web searches
+        if turn is None:
+            turn = TurnContext(message, self.translation_service)
+        
+        # Get document and real-time search context in parallel;
+        # either one is skipped if it fails or runs past its deadline
+        docs, search_context = self.gather_context(message, turn)
+        
+        return self._assemble_messages(message, docs, search_context, chat_history, summary)
+
+    def _assemble_messages(self, message: str, docs: List[Document], search_context: str,
+                           chat_history: List[Dict[str, Any]] = None, summary: str = "") -> list:
+        # Trim every section to its token budget before building the prompt
+        fitted = self.prompt_budget.fit(
+            message=message,
+            docs=docs,
+            web_context=search_context,
+            history=(chat_history or [])[-settings.CHAT_HISTORY_WINDOW:],
+            summary=summary
+        )
+
+        messages = []
+
+        # Add enhanced system prompt with both contexts; older turns are
+        # carried as a rolling summary instead of raw messages
+        system_prompt = self.get_system_prompt(
+            vector_service.format_context(fitted['docs']), fitted['web_context']
+        )
+        if fitted['summary']:
+            system_prompt += f"\n\n### 📝 पहिलेको कुराकानीको सारांश:\n{fitted['summary']}\n"
+        messages.append(SystemMessage(content=system_prompt))
+
+        # Add the most recent messages from history that fit the budget
+        if fitted['history']:
+            for msg in fitted['history']:
+                if msg['role'] == 'user':
+                    messages.append(HumanMessage(content=msg['message']))
+                elif msg['role'] == 'assistant':
+                    messages.append(AIMessage(content=msg['message']))
+
+        # Add current user message
+        messages.append(HumanMessage(content=message))
+        return messages
+
+    def _uses_answer_cache(self, chat_history: List[Dict[str, Any]] = None, summary: str = "") -> bool:
+        # Only context-free questions can share an answer across chats
+        return self.answer_cache_enabled and not chat_history and not summary
+
+    def _lookup_cached_answer(self, turn: TurnContext) -> Tuple[List[float], str]:
+        """
+        Embed the translated question and look for a cached answer.
+
+        Returns ``(vector, answer)``; ``answer`` is None on a miss and
+        ``vector`` is None if the question could not be embedded.
+        """
+        try:
+            vector = vector_service.embed_query(turn.translated_query)
+        except Exception as e:
+            print(f"Answer cache lookup skipped: {e}")
+            return None, None
+        return vector, answer_cache.lookup(vector, vector_service.index_revision)
+
+    def _store_cached_answer(self, turn: TurnContext, vector: List[float], answer: str) -> None:
+        if vector is None or not answer:
+            return
+        try:
+            answer_cache.store_answer(turn.translated_query, vector, answer, vector_service.index_revision)
+        except Exception as e:
+            print(f"Answer cache store failed: {e}")
+
+    def get_chat_response(self, message: str, chat_history: List[Dict[str, Any]] = None,
+                          summary: str = "") -> str:
         """
         Processes user message and returns a response from the AI assistant.
         Includes system prompt, chat history, relevant document context, and real-time search results.
+        First-turn questions similar to one answered before are served from the answer cache.
         """
         try:
             if self.provider == "google" and self.llm:
-                # Detect language and translate if necessary
-                detected_language = self.translation_service.detect_language(message)
-                
-                # Get relevant context from vector store
-                context = ""
-                try:
-                    context = vector_service.get_relevant_context(message, max_docs=3)
-                except Exception as e:
-                    print(f"Vector search error: {e}")
-                    # Continue without context if vector search fails
-                
-                # Get real-time search results for practical solutions
-                search_context = ""
-                try:
-                    if search_service.is_available:
-                        search_context = search_service.search_farming_solutions(message, detected_language)
-                except Exception as e:
-                    print(f"Search service error: {e}")
-                    # Continue without search context if search fails
-                
-                messages = []
-
-                # Add enhanced system prompt with both contexts
-                messages.append(SystemMessage(content=self.get_system_prompt(context, search_context)))
-
-                # Add last 10 messages from history for context
-                if chat_history:
-                    for msg in chat_history[-25:]:
-                        if msg['role'] == 'user':
-                            messages.append(HumanMessage(content=msg['message']))
-                        elif msg['role'] == 'assistant':
-                            messages.append(AIMessage(content=msg['message']))
-
-                # Add current user message
-                messages.append(HumanMessage(content=message))
+                turn = TurnContext(message, self.translation_service)
+
+                vector = None
+                if self._uses_answer_cache(chat_history, summary):
+                    vector, cached = self._lookup_cached_answer(turn)
+                    if cached is not None:
+                        return cached
+
+                messages = self.build_messages(message, chat_history, summary, turn=turn)
 
                 # Invoke the model with full message list
-                response = self.llm.invoke(messages)
+                response = self.llm_breaker.call(self.llm.invoke, messages, timeout=self.llm_timeout)
+                self._store_cached_answer(turn, vector, response.content)
+                return response.content
+
+            else:
+                # Fallback for local development
+                return f"यो '{message}' को लागि mock response हो। कृपया .env फाइलमा GOOGLE_API_KEY राखेर असली उत्तर पाउनुहोस्।"
+
+        except CircuitOpenError:
+            return UNAVAILABLE_MESSAGE
+        except Exception as e:
+            return f"माफ गर्नुहोस्, तपाईंको सन्देश प्रक्रियामा त्रुटि भयो। त्रुटि: {str(e)}"
+
+    def stream_chat_response(self, message: str, chat_history: List[Dict[str, Any]] = None,
+                             summary: str = "") -> Iterator[str]:
+        """
+        Same as get_chat_response, but yields the answer in pieces as the
+        model generates them.
+        """
+        try:
+            if self.provider == "google" and self.llm:
+                turn = TurnContext(message, self.translation_service)
+
+                vector = None
+                if self._uses_answer_cache(chat_history, summary):
+                    vector, cached = self._lookup_cached_answer(turn)
+                    if cached is not None:
+                        yield cached
+                        return
+
+                messages = self.build_messages(message, chat_history, summary, turn=turn)
+
+                parts = []
+                self.llm_breaker.before_call()
+                try:
+                    for chunk in self._stream_with_deadlines(self.llm.stream(messages)):
+                        if chunk.content:
+                            parts.append(chunk.content)
+                            yield chunk.content
+                except Exception:
+                    self.llm_breaker.record_failure()
+                    raise
+                except BaseException:
+                    # Client disconnected (GeneratorExit): tokens so far still
+                    # show the model is up, otherwise there is no outcome
+                    if parts:
+                        self.llm_breaker.record_success()
+                    else:
+                        self.llm_breaker.record_abandoned()
+                    raise
+                self.llm_breaker.record_success()
+
+                # Only reached if the stream was consumed to the end
+                self._store_cached_answer(turn, vector, ''.join(parts))
+
+            else:
+                # Fallback for local development
+                yield f"यो '{message}' को लागि mock response हो। कृपया .env फाइलमा GOOGLE_API_KEY राखेर असली उत्तर पाउनुहोस्।"
+
+        except CircuitOpenError:
+            yield UNAVAILABLE_MESSAGE
+        except Exception as e:
+            yield f"माफ गर्नुहोस्, तपाईंको सन्देश प्रक्रियामा त्रुटि भयो। त्रुटि: {str(e)}"
+
+    def _stream_with_deadlines(self, stream: Iterator) -> Iterator:
+        """
+        Yield from ``stream``, raising TimeoutError if the first item takes
+        longer than ``stream_first_chunk_timeout`` or a later one longer than
+        ``stream_chunk_timeout``.
+
+        Items are pulled in the model breaker's thread pool; a pull that
+        overruns keeps its thread until the client gives up.
+        """
+        timeout = self.stream_first_chunk_timeout
+        while True:
+            future = self.llm_breaker.executor.submit(next, stream, None)
+            try:
+                chunk = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise TimeoutError(f"Model stream sent nothing for {timeout}s")
+            if chunk is None:
+                return
+            yield chunk
+            timeout = self.stream_chunk_timeout
+
+    async def _afetch_search_context(self, message: str, turn: TurnContext) -> str:
+        if not search_service.is_available:
+            return ""
+        return await search_service.asearch_farming_solutions(message, turn.language, turn=turn)
+
+    async def agather_context(self, message: str, turn: TurnContext) -> Tuple[List[Document], str]:
+        """Async version of gather_context: both sources run as tasks with their own deadlines."""
+        async def bounded(name: str, coro, timeout: float, default):
+            try:
+                return await asyncio.wait_for(coro, timeout=timeout) or default
+            except asyncio.TimeoutError:
+                print(f"{name} context timed out after {timeout}s, continuing without it")
+            except Exception as e:
+                print(f"{name} context error: {e}")
+            return default
+
+        return await asyncio.gather(
+            bounded('vector', vector_service.asimilarity_search(message, self.rag_max_docs, turn),
+                    self.rag_timeout, []),
+            bounded('search', self._afetch_search_context(message, turn), self.web_search_timeout, ""),
+        )
+
+    async def abuild_messages(self, message: str, chat_history: List[Dict[str, Any]] = None,
+                              summary: str = "", turn: TurnContext = None) -> list:
+        """Async version of build_messages."""
+        if turn is None:
+            turn = TurnContext(message, self.translation_service)
+        docs, search_context = await self.agather_context(message, turn)
+        return self._assemble_messages(message, docs, search_context, chat_history, summary)
+
+    async def aget_chat_response(self, message: str, chat_history: List[Dict[str, Any]] = None,
+                                 summary: str = "") -> str:
+        """Async version of get_chat_response; no thread is held while waiting on the model."""
+        try:
+            if self.provider == "google" and self.llm:
+                turn = TurnContext(message, self.translation_service)
+
+                vector = None
+                if self._uses_answer_cache(chat_history, summary):
+                    try:
+                        vector = await vector_service.aembed_query(await turn.atranslated_query())
+                    except Exception as e:
+                        print(f"Answer cache lookup skipped: {e}")
+                    if vector is not None:
+                        # SQLite and matrix work under a lock: keep it off the event loop
+                        cached = await asyncio.to_thread(answer_cache.lookup, vector, vector_service.index_revision)
+                        if cached is not None:
+                            return cached
+
+                messages = await self.abuild_messages(message, chat_history, summary, turn=turn)
+                response = await self.llm_breaker.acall(self.llm.ainvoke, messages, timeout=self.llm_timeout)
+                await asyncio.to_thread(self._store_cached_answer, turn, vector, response.content)
                 return response.content
 
             else:
                 # Fallback for local development
                 return f"यो '{message}' को लागि mock response हो। कृपया .env फाइलमा GOOGLE_API_KEY राखेर असली उत्तर पाउनुहोस्।"
 
+        except CircuitOpenError:
+            return UNAVAILABLE_MESSAGE
         except Exception as e:
             return f"माफ गर्नुहोस्, तपाईंको सन्देश प्रक्रियामा त्रुटि भयो। त्रुटि: {str(e)}"
 
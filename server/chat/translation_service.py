@@ -1,7 +1,12 @@
+import asyncio
+import json
 import os
 import logging
-from typing import Optional
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from langchain_google_genai import ChatGoogleGenerativeAI
+from .cache_store import LRUCache, SQLiteKVStore, normalize_text
+from .resilience import get_breaker
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +28,76 @@ class TranslationService:
             self.is_available = False
             logger.warning("No GOOGLE_API_KEY found. Translation service will be disabled.")
 
+        # Two-tier cache of normalized Nepali text -> English translation
+        self.memory_cache = LRUCache(max_entries=int(os.getenv('TRANSLATION_CACHE_SIZE', 4096)))
+        self.disk_cache = SQLiteKVStore(
+            Path(os.getenv(
+                'TRANSLATION_CACHE_PATH',
+                Path(__file__).resolve().parent.parent / 'cache' / 'translations.sqlite3'
+            )),
+            table='translations',
+            max_entries=int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', 100000))
+        )
+        self.disk_hits = 0
+
+        # Failing translations fall back to the untranslated text
+        self.breaker = get_breaker('translation')
+        # Batch requests are larger and slower; their timeouts mustn't open
+        # the circuit that chat turns depend on
+        self.batch_breaker = get_breaker('translation_batch')
+        self.timeout = float(os.getenv('TRANSLATION_TIMEOUT', 8))
+        # Texts sent in one request by translate_batch
+        self.batch_size = int(os.getenv('TRANSLATION_BATCH_SIZE', 50))
+
+    def _cached_translation(self, key: str) -> Optional[str]:
+        translated = self.memory_cache.get(key)
+        if translated is not None:
+            return translated
+
+        try:
+            blob = self.disk_cache.get(key)
+        except Exception as e:
+            logger.error(f"Translation cache read failed: {str(e)}")
+            return None
+
+        if blob is None:
+            return None
+
+        translated = blob.decode('utf-8')
+        self.disk_hits += 1
+        self.memory_cache.set(key, translated)
+        return translated
+
+    def _store_translation(self, key: str, translated: str) -> None:
+        self.memory_cache.set(key, translated)
+        try:
+            self.disk_cache.set(key, translated.encode('utf-8'))
+        except Exception as e:
+            logger.error(f"Translation cache write failed: {str(e)}")
+
+    def seed_cache(self, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Pre-load known Nepali -> English translations into both cache tiers."""
+        items = [(normalize_text(nepali), english.strip()) for nepali, english in pairs
+                 if nepali.strip() and english.strip()]
+        for key, translated in items:
+            self.memory_cache.set(key, translated)
+        self.disk_cache.set_many((key, translated.encode('utf-8')) for key, translated in items)
+        return len(items)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        memory = self.memory_cache.stats()
+        # Every memory miss goes to disk, so disk misses are what reached the LLM
+        lookups = memory['hits'] + memory['misses']
+        hits = memory['hits'] + self.disk_hits
+        return {
+            'lookups': lookups,
+            'memory_hits': memory['hits'],
+            'disk_hits': self.disk_hits,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_entries': memory['entries'],
+            'disk_entries': self.disk_cache.count(),
+        }
+
     def detect_language(self, text: str) -> str:
         """
         Simple language detection based on script.
@@ -32,29 +107,39 @@ class TranslationService:
         nepali_chars = any('\u0900' <= char <= '\u097F' for char in text)
         return 'nepali' if nepali_chars else 'english'
 
+    @staticmethod
+    def _translation_prompt(text: str) -> str:
+        return f"""Translate the following Nepali text to English. Focus on agricultural and farming context. Only provide the English translation, nothing else:
+
+Nepali text: {text}
+
+English translation:"""
+
     def translate_to_english(self, text: str) -> str:
         """
         Translate Nepali text to English using Google Gemini.
         Returns original text if it's already in English or if translation fails.
         """
-        if not self.is_available:
-            logger.warning("Translation service not available, returning original text")
-            return text
-
         # Check if text is already in English
         if self.detect_language(text) == 'english':
             logger.debug("Text is already in English, no translation needed")
             return text
 
-        try:
-            prompt = f"""Translate the following Nepali text to English. Focus on agricultural and farming context. Only provide the English translation, nothing else:
-
-Nepali text: {text}
+        cache_key = normalize_text(text)
+        cached = self._cached_translation(cache_key)
+        if cached is not None:
+            logger.debug(f"Translation cache hit for '{text[:50]}...'")
+            return cached
 
-English translation:"""
+        if not self.is_available:
+            logger.warning("Translation service not available, returning original text")
+            return text
 
-            response = self.llm.invoke(prompt)
+        try:
+            response = self.breaker.call(self.llm.invoke, self._translation_prompt(text), timeout=self.timeout)
             translated_text = response.content.strip()
+            if translated_text:
+                self._store_translation(cache_key, translated_text)
             
             logger.info(f"Translated '{text[:50]}...' to '{translated_text[:50]}...'")
             return translated_text
@@ -64,6 +149,82 @@ English translation:"""
             # Return original text if translation fails
             return text
 
+    @staticmethod
+    def _batch_translation_prompt(texts: List[str]) -> str:
+        return f"""Translate each Nepali text in the following JSON array to English. Focus on agricultural and farming context.
+Reply with only a JSON array of the English translations, in the same order and with the same number of items:
+
+{json.dumps(texts, ensure_ascii=False)}"""
+
+    @staticmethod
+    def _parse_batch_translation(content: str, expected: int) -> Optional[List[str]]:
+        content = content.strip()
+        if content.startswith('```'):
+            # Drop a markdown code fence around the JSON
+            content = content.strip('`')
+            content = content[content.find('['):]
+        try:
+            translations = json.loads(content)
+        except ValueError:
+            return None
+        if not isinstance(translations, list) or len(translations) != expected:
+            return None
+        return [str(item).strip() for item in translations]
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        """
+        Translate many texts with one LLM request per TRANSLATION_BATCH_SIZE uncached texts.
+
+        English and cached texts cost nothing. Each text falls back to the
+        original if its batch fails, like translate_to_english.
+        """
+        results = list(texts)
+
+        # Normalized text -> positions, so duplicates are translated once
+        pending: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not text.strip() or self.detect_language(text) == 'english':
+                continue
+            cache_key = normalize_text(text)
+            cached = self._cached_translation(cache_key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(cache_key, []).append(i)
+
+        if not pending:
+            return results
+        if not self.is_available:
+            logger.warning("Translation service not available, returning original text")
+            return results
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            originals = [texts[positions[0]] for _, positions in batch]
+            try:
+                response = self.batch_breaker.call(
+                    self.llm.invoke, self._batch_translation_prompt(originals), timeout=self.timeout * 2
+                )
+            except Exception as e:
+                logger.error(f"Batch translation failed: {str(e)}")
+                continue
+
+            translations = self._parse_batch_translation(response.content, len(originals))
+            if translations is None:
+                logger.error(f"Batch translation returned an unexpected reply for {len(originals)} texts")
+                continue
+
+            for (cache_key, positions), translated in zip(batch, translations):
+                if not translated:
+                    continue
+                self._store_translation(cache_key, translated)
+                for i in positions:
+                    results[i] = translated
+
+        logger.info(f"Translated {len(pending)} texts in {(len(items) - 1) // self.batch_size + 1} requests")
+        return results
+
     def translate_query_for_rag(self, query: str) -> str:
         """
         Translate query for RAG search if needed.
@@ -81,5 +242,40 @@ English translation:"""
             return query
 
 
+    async def atranslate_to_english(self, text: str) -> str:
+        """Async version of translate_to_english using the LLM's ainvoke."""
+        if self.detect_language(text) == 'english':
+            return text
+
+        cache_key = normalize_text(text)
+        cached = await asyncio.to_thread(self._cached_translation, cache_key)
+        if cached is not None:
+            logger.debug(f"Translation cache hit for '{text[:50]}...'")
+            return cached
+
+        if not self.is_available:
+            logger.warning("Translation service not available, returning original text")
+            return text
+
+        try:
+            response = await self.breaker.acall(self.llm.ainvoke, self._translation_prompt(text), timeout=self.timeout)
+            translated_text = response.content.strip()
+            if translated_text:
+                await asyncio.to_thread(self._store_translation, cache_key, translated_text)
+
+            logger.info(f"Translated '{text[:50]}...' to '{translated_text[:50]}...'")
+            return translated_text
+
+        except Exception as e:
+            logger.error(f"Translation failed: {str(e)}")
+            return text
+
+    async def atranslate_query_for_rag(self, query: str) -> str:
+        """Async version of translate_query_for_rag."""
+        if not query.strip() or self.detect_language(query) != 'nepali':
+            return query
+        return await self.atranslate_to_english(query)
+
+
 # Global instance
 translation_service = TranslationService()
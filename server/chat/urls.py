@@ -3,10 +3,17 @@ from . import views
 
 urlpatterns = [
     path('chat/create/', views.create_chat, name='create_chat'),
+    path('chat/<str:chat_id>/', views.get_chat, name='get_chat'),
     path('chat/<str:chat_id>/messages/', views.get_chat_messages, name='get_chat_messages'),
     path('message/send/', views.send_message, name='send_message'),
+    path('message/stream/', views.stream_message, name='stream_message'),
     path('documents/search/', views.search_documents, name='search_documents'),
+    path('documents/search/batch/', views.batch_search_documents, name='batch_search_documents'),
+    path('async/message/send/', views.async_send_message, name='async_send_message'),
+    path('async/documents/search/', views.async_search_documents, name='async_search_documents'),
     path('documents/test-search/', views.test_search, name='test_search'),
     path('vectorstore/initialize/', views.initialize_vectorstore, name='initialize_vectorstore'),
     path('vectorstore/status/', views.vectorstore_status, name='vectorstore_status'),
+    path('cache/stats/', views.cache_stats, name='cache_stats'),
+    path('status/dependencies/', views.dependency_status, name='dependency_status'),
 ]
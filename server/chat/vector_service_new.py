@@ -1,92 +1,227 @@
+import asyncio
+import hashlib
+import multiprocessing
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Set, Tuple
 import logging
 
-from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
 from langchain.schema import Document
+from .answer_cache import answer_cache
+from .cache_store import LRUCache
+from .embedding_backends import LEGACY_BACKEND_ID, HashingEmbeddings, create_embeddings, default_backend
+from .embedding_cache import QueryEmbeddingCache, embed_queries
+from .embedding_pipeline import EmbeddingPipeline, EmbeddingError
+from .exact_index import QUANTIZATIONS, ExactIndex
+from .ingest_manifest import IngestManifest
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .metadata_filter import MetadataIndex, SearchFilter, tag_text, tags_value
+from .pdf_loading import iter_pdf_pages, load_pdf
+from .request_context import TurnContext
+from .reranking import RERANK_METHODS, CrossEncoderReranker, mmr
+from .resilience import get_breaker
 from .translation_service import translation_service
 
 logger = logging.getLogger(__name__)
 
 
+def _failed_pages(error: Exception) -> Iterator[Document]:
+    """Pages of a PDF that failed to parse in the pool: raises ``error`` like a lazy parse would."""
+    raise error
+    yield
+
+
 class VectorService:
+    RETRIEVAL_MODES = ('vector', 'lexical', 'hybrid')
+    RERANK_METHODS = RERANK_METHODS
+
     def __init__(self):
-        """Initialize the vector service with ChromaDB and Google embeddings."""
+        """Initialize the vector service with ChromaDB and the configured embedding backend."""
         self.data_dir = Path(__file__).resolve().parent.parent.parent / 'data'
         self.persist_directory = Path(__file__).resolve().parent.parent / 'chroma_db'
+        self.manifest = IngestManifest(self.persist_directory.parent / 'chroma_manifest.json')
         
-        # Initialize embeddings
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if api_key:
-            self.embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/embedding-001",
-                google_api_key=api_key
-            )
-        else:
-            self.embeddings = None
-            logger.warning("No GOOGLE_API_KEY found. Vector store functionality will be limited.")
+        # Initialize embeddings: 'google', 'sentence-transformers' or 'hashing'
+        self.embedding_backend = default_backend()
+        self.embeddings, self.embedding_backend_id = create_embeddings(
+            self.embedding_backend,
+            cache_path=Path(os.getenv(
+                'EMBEDDING_CACHE_PATH',
+                self.persist_directory.parent / 'cache' / 'embeddings.sqlite3'
+            ))
+        )
+        if self.embeddings:
+            logger.info(f"Using embedding backend {self.embedding_backend_id}")
         
+        # Translated query text -> embedding, so repeated questions skip the API
+        self.query_cache = QueryEmbeddingCache(
+            max_entries=int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', 2048)),
+            ttl=float(os.getenv('QUERY_EMBEDDING_CACHE_TTL', 3600)),
+            shared_cache=os.getenv('QUERY_EMBEDDING_SHARED_CACHE') or None
+        )
+
+        # Guards query-time embedding calls; bulk ingestion has its own retries
+        self.embedding_breaker = get_breaker('embeddings')
+        # Batch search has its own, so its slower requests can't open the
+        # circuit used by chat turns
+        self.batch_embedding_breaker = get_breaker('embeddings_batch')
+        self.embedding_timeout = float(os.getenv('EMBEDDING_TIMEOUT', 5))
+
+        # Source / page / tag -> chunk ids, kept in step by the lexical index,
+        # so filtered searches only score the chunks that pass
+        self.metadata_index = MetadataIndex()
+        # BM25 index over the same chunks: exact-term matches (pesticide and
+        # crop names, doses) and a retrieval path that needs no network
+        self.lexical_index = LexicalIndex(
+            self.persist_directory.parent / 'lexical_index.sqlite3',
+            metadata_index=self.metadata_index
+        )
+        # Index revision the in-memory lexical and metadata indexes reflect
+        self._lexical_revision = self.index_revision
+        # 'vector', 'lexical' or 'hybrid' (rank fusion of both)
+        self.retrieval_mode = os.getenv('RETRIEVAL_MODE', 'hybrid')
+        self.hybrid_candidates = int(os.getenv('HYBRID_CANDIDATES', 20))
+        self.rrf_k = int(os.getenv('RRF_K', 60))
+
+        # Optional brute-force search over a memory-mapped copy of the
+        # embeddings instead of Chroma's HNSW index
+        self.use_exact_index = os.getenv('VECTOR_EXACT_INDEX', 'false').lower() == 'true'
+        self.exact_index_dir = self.persist_directory.parent / 'vector_index'
+        self.exact_index: Optional[ExactIndex] = None
+        # (index revision, sidecar mtime) last looked at by current_exact_index
+        self._exact_index_checked: Optional[Tuple[str, int]] = None
+        # 'none', 'float16' or 'int8'; quantized scans re-score the best
+        # rescore_factor * k candidates at full precision
+        self.exact_index_quantization = os.getenv('VECTOR_INDEX_QUANTIZATION', 'none')
+        if self.exact_index_quantization not in QUANTIZATIONS:
+            logger.error(f"Unknown VECTOR_INDEX_QUANTIZATION '{self.exact_index_quantization}', expected one of: "
+                         f"{', '.join(QUANTIZATIONS)}. Using full precision.")
+            self.exact_index_quantization = 'none'
+        self.exact_index_rescore_factor = int(os.getenv('VECTOR_INDEX_RESCORE_FACTOR', 4))
+        # (index revision, filter) -> ExactIndex of the filter's chunks, for
+        # tag filters searched without the exact index
+        self.filtered_indexes = LRUCache(max_entries=int(os.getenv('FILTERED_INDEX_CACHE_SIZE', 16)))
+
+        # Re-ranking of over-fetched candidates: 'none', 'mmr' or 'cross-encoder'
+        self.rerank_method = os.getenv('RERANK_METHOD', 'mmr')
+        self.rerank_candidates = int(os.getenv('RERANK_CANDIDATES', 12))
+        self.mmr_lambda = float(os.getenv('MMR_LAMBDA', 0.6))
+        self._cross_encoder = None
+        # Stand-in vectors for MMR when the embedding backend is unavailable
+        self.fallback_embeddings = HashingEmbeddings()
+
+        # Number of processes used to parse PDFs; 1 keeps loading in-process.
+        # init_vectorstore defaults to the CPU count, the web process to 1
+        self.load_workers = int(os.getenv('VECTOR_LOAD_WORKERS', 1))
+
         self.vectorstore = None
+        # Recorded in the ingest manifest; changing either re-indexes everything
+        self.chunking = {
+            'chunk_size': int(os.getenv('CHUNK_SIZE', 3000)),
+            'chunk_overlap': int(os.getenv('CHUNK_OVERLAP', 500)),
+        }
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=3000,
-            chunk_overlap=500,
+            chunk_size=self.chunking['chunk_size'],
+            chunk_overlap=self.chunking['chunk_overlap'],
             length_function=len,
         )
 
-    def load_documents(self) -> List[Document]:
-        """Load all PDF documents from the data directory."""
-        documents = []
-        
+    def list_pdf_files(self) -> List[Path]:
+        """List the PDF files in the data directory in a stable order."""
         if not self.data_dir.exists():
             logger.error(f"Data directory {self.data_dir} does not exist")
-            return documents
-        
-        pdf_files = list(self.data_dir.glob("*.pdf"))
-        logger.info(f"Found {len(pdf_files)} PDF files to process")
-        
-        for pdf_file in pdf_files:
-            try:
+            return []
+
+        return sorted(self.data_dir.glob("*.pdf"))
+
+    def iter_loaded_files(self, pdf_files: List[Path],
+                          workers: Optional[int] = None) -> Iterator[Tuple[Path, Iterable[Document]]]:
+        """
+        Parse PDFs and yield ``(pdf_file, pages)`` in input order.
+
+        With one worker, pages are parsed lazily as the caller iterates, so
+        only one page is in memory at a time. With more workers the files
+        are parsed concurrently in a process pool, keeping at most
+        ``2 * workers`` parsed files in memory. Either way a file that fails
+        to parse is still yielded, and its error is raised when its pages
+        are iterated.
+        """
+        if workers is None:
+            workers = self.load_workers
+        workers = max(1, min(workers, len(pdf_files)))
+
+        if workers == 1:
+            for pdf_file in pdf_files:
                 logger.info(f"Loading PDF: {pdf_file.name}")
-                loader = PyPDFLoader(str(pdf_file))
-                docs = loader.load()
-                
-                # Add source metadata
-                for doc in docs:
-                    doc.metadata['source'] = pdf_file.name
-                
-                documents.extend(docs)
-                logger.info(f"Loaded {len(docs)} pages from {pdf_file.name}")
-                
-            except Exception as e:
-                logger.error(f"Error loading {pdf_file.name}: {str(e)}")
-                continue
-        
-        logger.info(f"Total documents loaded: {len(documents)}")
-        return documents
+                yield pdf_file, iter_pdf_pages(pdf_file)
+            return
 
-    def split_documents(self, documents: List[Document]) -> List[Document]:
-        """Split documents into smaller chunks."""
-        if not documents:
-            logger.warning("No documents to split")
-            return []
-        
-        try:
-            chunks = self.text_splitter.split_documents(documents)
-            logger.info(f"Split {len(documents)} documents into {len(chunks)} chunks")
-            return chunks
-        except Exception as e:
-            logger.error(f"Error splitting documents: {str(e)}")
-            return []
+        logger.info(f"Loading {len(pdf_files)} PDFs with {workers} worker processes")
+        # Spawn rather than fork: forking a threaded web process can copy
+        # locks held by other threads into the children
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            remaining = iter(pdf_files)
+            window = deque()
+
+            for pdf_file in remaining:
+                window.append((pdf_file, executor.submit(load_pdf, str(pdf_file))))
+                if len(window) >= 2 * workers:
+                    break
+
+            while window:
+                pdf_file, future = window.popleft()
+                next_file = next(remaining, None)
+                if next_file is not None:
+                    window.append((next_file, executor.submit(load_pdf, str(next_file))))
+
+                try:
+                    docs, elapsed = future.result()
+                except Exception as e:
+                    yield pdf_file, _failed_pages(e)
+                    continue
+                logger.info(f"Loaded {len(docs)} pages from {pdf_file.name} in {elapsed:.2f}s")
+                yield pdf_file, docs
+
+    def iter_chunks(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """Split pages into chunks one page at a time, tagging each with its crops and topics."""
+        for page in pages:
+            for chunk in self.text_splitter.split_documents([page]):
+                chunk.metadata['tags'] = tags_value(tag_text(chunk.page_content))
+                yield chunk
+
+    @property
+    def index_backend_id(self) -> Optional[str]:
+        """Embedding backend the persisted index was built with, if any."""
+        if self.manifest.embedding_backend:
+            return self.manifest.embedding_backend
+        # Stores built before the backend was recorded, including ones
+        # built before the manifest existed, were built with Gemini
+        if self.manifest.files or (self.persist_directory.exists() and not self.manifest.exists()):
+            return LEGACY_BACKEND_ID
+        return None
+
+    def _backend_matches(self) -> bool:
+        built_with = self.index_backend_id
+        if built_with and built_with != self.embedding_backend_id:
+            logger.error(f"Vectorstore was built with {built_with} but the configured embedding backend "
+                         f"is {self.embedding_backend_id}. Rebuild it with init_vectorstore --force-recreate.")
+            return False
+        return True
 
     def load_existing_vectorstore(self) -> bool:
         """Load existing vectorstore from disk."""
         if not self.embeddings:
             logger.error("No embeddings available. Cannot load vectorstore.")
             return False
+
+        if not self._backend_matches():
+            return False
         
         try:
             if self.persist_directory.exists():
@@ -95,6 +230,7 @@ class VectorService:
                     embedding_function=self.embeddings
                 )
                 logger.info("Existing vectorstore loaded successfully")
+                self._ensure_lexical_index()
                 return True
             else:
                 logger.warning("No existing vectorstore found. Run initialization to create one.")
@@ -104,101 +240,663 @@ class VectorService:
             logger.error(f"Error loading existing vectorstore: {str(e)}")
             return False
 
-    def create_vectorstore(self, force_recreate: bool = False) -> bool:
-        """Create or load the ChromaDB vectorstore."""
+    def create_vectorstore(self, force_recreate: bool = False, resume: bool = False,
+                           full: bool = False) -> bool:
+        """
+        Create or load the ChromaDB vectorstore.
+
+        With ``force_recreate`` the store is brought in line with ``data/``
+        using the ingest manifest: only new or changed PDFs are loaded,
+        split and embedded, and chunks of removed PDFs are deleted. With
+        ``resume``, files left half-indexed by an interrupted run continue
+        after their last committed batch instead of starting over. With
+        ``full``, the store is dropped and every PDF re-indexed (unchanged
+        chunks are still served from the embedding cache).
+        """
         if not self.embeddings:
             logger.error("No embeddings available. Cannot create vectorstore.")
             return False
         
         try:
             # Check if vectorstore already exists
-            if self.persist_directory.exists() and not force_recreate:
+            if self.persist_directory.exists() and not (force_recreate or full):
+                if not self._backend_matches():
+                    return False
                 logger.info("Loading existing vectorstore")
                 self.vectorstore = Chroma(
                     persist_directory=str(self.persist_directory),
                     embedding_function=self.embeddings
                 )
                 logger.info("Existing vectorstore loaded successfully")
+                self._ensure_lexical_index()
+                self.refresh_exact_index()
                 return True
             
-            # Create new vectorstore
-            logger.info("Creating new vectorstore...")
-            
-            # Load and process documents
-            documents = self.load_documents()
-            if not documents:
-                logger.error("No documents found to create vectorstore")
-                return False
+            return self.sync_vectorstore(resume=resume, full=full)
             
-            # Split documents into chunks
-            chunks = self.split_documents(documents)
-            if not chunks:
-                logger.error("No chunks created from documents")
-                return False
-            
-            # Create vectorstore
-            logger.info(f"Creating vectorstore with {len(chunks)} document chunks...")
-            self.vectorstore = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.embeddings,
-                persist_directory=str(self.persist_directory)
+        except Exception as e:
+            logger.error(f"Error creating vectorstore: {str(e)}")
+            return False
+
+    def _rebuild_reason(self, full: bool) -> Optional[str]:
+        """Why the store has to be rebuilt from scratch rather than synced, if it does."""
+        # A store built before the manifest existed has random chunk ids
+        # we cannot map back to files, vectors from another backend can't
+        # be mixed with ours, and chunks split differently would overlap.
+        if full:
+            return "Full rebuild requested"
+        if not self.manifest.exists():
+            return "No ingest manifest found"
+        built_with = self.index_backend_id
+        if built_with and built_with != self.embedding_backend_id:
+            return f"Embedding backend changed from {built_with} to {self.embedding_backend_id}"
+        # Manifests written before chunking was recorded used the defaults
+        built_chunking = self.manifest.chunking or ({'chunk_size': 3000, 'chunk_overlap': 500}
+                                                    if self.manifest.files else None)
+        if built_chunking and built_chunking != self.chunking:
+            return f"Chunking changed from {built_chunking} to {self.chunking}"
+        return None
+
+    def sync_vectorstore(self, resume: bool = False, full: bool = False) -> bool:
+        """
+        Apply the difference between ``data/`` and the ingest manifest to the vectorstore.
+
+        Runs as a streaming pipeline (page -> chunk -> embedding batch ->
+        upsert), so memory use does not grow with the size of the corpus.
+        The store is rebuilt from scratch instead when ``full`` is set or
+        the embedding backend or chunking settings changed.
+        """
+        self.vectorstore = Chroma(
+            persist_directory=str(self.persist_directory),
+            embedding_function=self.embeddings
+        )
+
+        reason = self._rebuild_reason(full)
+        if reason:
+            logger.info(f"{reason}, rebuilding vectorstore from scratch")
+            self.vectorstore.delete_collection()
+            self.vectorstore = Chroma(
+                persist_directory=str(self.persist_directory),
+                embedding_function=self.embeddings
             )
-            
-            logger.info("Vectorstore created successfully")
+            self.manifest.clear()
+            self.lexical_index.clear()
+        self.manifest.embedding_backend = self.embedding_backend_id
+        self.manifest.chunking = self.chunking
+
+        self._ensure_lexical_index()
+
+        pdf_files = self.list_pdf_files()
+        if not pdf_files and not self.manifest.files:
+            logger.error("No documents found to create vectorstore")
+            return False
+
+        changed, removed = self.manifest.diff(pdf_files)
+        logger.info(f"Ingest delta: {len(changed)} new or changed, {len(removed)} removed, "
+                    f"{len(pdf_files) - len(changed)} unchanged")
+
+        if changed or removed:
+            # Cached answers were grounded in the old index
+            answer_cache.clear()
+
+        for name in removed:
+            self._delete_file_chunks(name)
+            self.manifest.remove(name)
+            logger.info(f"Removed chunks of deleted file: {name}")
+        self.manifest.save()
+
+        success = True
+        digests = dict(changed)
+        loaded = set()
+        for pdf_file, pages in self.iter_loaded_files(list(digests)):
+            loaded.add(pdf_file)
+            if not self._index_file(pdf_file, digests[pdf_file], pages, resume=resume):
+                success = False
+        if len(loaded) != len(digests):
+            success = False
+
+        self.refresh_exact_index()
+        # This process kept its lexical index up to date while ingesting
+        self._lexical_revision = self.index_revision
+
+        logger.info("Vectorstore synchronized successfully" if success
+                    else "Vectorstore synchronized with errors")
+        return success
+
+    def write_exact_index(self) -> Optional[ExactIndex]:
+        """Copy the collection's embeddings into the ``.npy`` sidecar and return it memory-mapped."""
+        try:
+            index = ExactIndex.from_collection(self.vectorstore._collection, revision=self.index_revision)
+            index.save(self.exact_index_dir)
+        except Exception as e:
+            logger.error(f"Could not write exact index: {str(e)}")
+            return None
+
+        logger.info(f"Wrote exact index of {len(index)} vectors ({index.nbytes / 1e6:.1f} MB)")
+        return self._load_exact_index() or index
+
+    def refresh_exact_index(self) -> None:
+        """Rewrite the exact index sidecar if it is enabled and missing or out of date."""
+        if not self.use_exact_index:
+            return
+        index = ExactIndex.load(self.exact_index_dir)
+        if index is None or index.revision != self.index_revision:
+            self.write_exact_index()
+
+    def _load_exact_index(self) -> Optional[ExactIndex]:
+        return ExactIndex.load(
+            self.exact_index_dir,
+            quantization=self.exact_index_quantization,
+            rescore_factor=self.exact_index_rescore_factor
+        )
+
+    def current_exact_index(self) -> Optional[ExactIndex]:
+        """
+        The exact index for the current index revision, or None if it is disabled.
+
+        Loads the sidecar written by the last sync. Building it copies the
+        whole collection, so that is never done here: while the sidecar is
+        missing or older than the index, searches go through Chroma.
+        """
+        if not self.use_exact_index or not self.vectorstore:
+            return None
+
+        revision = self.index_revision
+        if self.exact_index is not None and self.exact_index.revision == revision:
+            return self.exact_index
+
+        try:
+            sidecar_mtime = (self.exact_index_dir / ExactIndex.IDS_FILE).stat().st_mtime_ns
+        except OSError:
+            sidecar_mtime = 0
+        if self._exact_index_checked != (revision, sidecar_mtime):
+            self._exact_index_checked = (revision, sidecar_mtime)
+            index = self._load_exact_index()
+            self.exact_index = index if index is not None and index.revision == revision else None
+            if self.exact_index is None:
+                logger.warning("Exact index sidecar is missing or stale, searching Chroma "
+                               "until init_vectorstore writes it")
+        return self.exact_index
+
+    def _documents_for(self, chunk_ids: List[str]) -> Dict[str, Document]:
+        """Chunks by id, from the lexical index where possible, else from Chroma."""
+        docs = self.lexical_index.documents_for(chunk_ids)
+        missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in docs]
+        if missing:
+            stored = self.vectorstore._collection.get(ids=missing, include=['documents', 'metadatas'])
+            for chunk_id, text, metadata in zip(stored['ids'], stored['documents'], stored['metadatas']):
+                docs[chunk_id] = Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+        return docs
+
+    def _exact_results(self, hits: List[Tuple[str, float]]) -> List[Tuple[Document, float]]:
+        """Turn exact index hits into the (document, relevance score) pairs Chroma would return."""
+        docs = self._documents_for([chunk_id for chunk_id, _ in hits])
+        # Squared L2 distance between unit vectors, as in Chroma's default space
+        relevance = self.vectorstore._select_relevance_score_fn()
+        return [(docs[chunk_id], relevance(2.0 - 2.0 * similarity))
+                for chunk_id, similarity in hits if chunk_id in docs]
+
+    def _delete_file_chunks(self, name: str) -> None:
+        chunk_ids = self.manifest.chunk_ids(name)
+        if chunk_ids:
+            self.vectorstore.delete(ids=chunk_ids)
+            self.lexical_index.remove(chunk_ids)
+
+    def _ensure_lexical_index(self, chunk_ids: Optional[List[str]] = None) -> None:
+        """
+        Copy chunks the lexical index lacks from the vectorstore.
+
+        Covers stores built before the lexical index existed. Without
+        ``chunk_ids`` the whole collection is copied, but only if the
+        lexical index is empty.
+        """
+        if chunk_ids is None:
+            if len(self.lexical_index):
+                return
+            missing = None
+        else:
+            missing = self.lexical_index.missing(chunk_ids)
+            if not missing:
+                return
+
+        try:
+            stored = self.vectorstore._collection.get(ids=missing, include=['documents', 'metadatas'])
+        except Exception as e:
+            logger.error(f"Could not read chunks for the lexical index: {str(e)}")
+            return
+
+        if stored['ids']:
+            self.lexical_index.add(stored['ids'], [
+                Document(page_content=text, metadata=metadata or {})
+                for text, metadata in zip(stored['documents'], stored['metadatas'])
+            ])
+            logger.info(f"Added {len(stored['ids'])} stored chunks to the lexical index")
+
+    def _index_file(self, pdf_file: Path, digest: str, pages: Iterable[Document],
+                    resume: bool = False) -> bool:
+        """
+        Stream the pages of a single PDF into the vectorstore, replacing any chunks it had before.
+
+        Progress is checkpointed in the manifest after every stored batch so
+        an interrupted run can be resumed.
+        """
+        try:
+            committed = self.manifest.committed_chunk_ids(pdf_file.name, digest) if resume else set()
+            if committed:
+                logger.info(f"Resuming {pdf_file.name}: {len(committed)} chunks already stored")
+                self._ensure_lexical_index(sorted(committed))
+            else:
+                self._delete_file_chunks(pdf_file.name)
+
+            # Local backends have no API quota to respect
+            pipeline = EmbeddingPipeline(
+                self.embeddings,
+                requests_per_minute=None if self.embedding_backend == 'google' else 1e9
+            )
+            chunk_ids = []
+            # Ids are derived from the file name and content hash so
+            # re-ingesting identical content is idempotent and resumable,
+            # while identical copies under two names don't share chunks.
+            id_prefix = hashlib.sha256(f"{pdf_file.name}:{digest}".encode('utf-8')).hexdigest()[:16]
+
+            def batches():
+                batch_ids, batch_docs = [], []
+                for i, chunk in enumerate(self.iter_chunks(pages)):
+                    chunk_id = f"{id_prefix}-{i}"
+                    chunk_ids.append(chunk_id)
+                    if chunk_id in committed:
+                        continue
+
+                    batch_ids.append(chunk_id)
+                    batch_docs.append(chunk)
+                    if len(batch_ids) == pipeline.batch_size:
+                        yield batch_ids, batch_docs
+                        batch_ids, batch_docs = [], []
+                if batch_ids:
+                    yield batch_ids, batch_docs
+
+            def upsert_batch(batch_ids, batch_docs, vectors):
+                self.vectorstore._collection.upsert(
+                    ids=batch_ids,
+                    embeddings=vectors,
+                    documents=[doc.page_content for doc in batch_docs],
+                    metadatas=[doc.metadata for doc in batch_docs],
+                )
+                self.lexical_index.add(batch_ids, batch_docs)
+                committed.update(batch_ids)
+                self.manifest.record_progress(pdf_file, digest, sorted(committed))
+                self.manifest.save()
+
+            logger.info(f"Embedding chunks from {pdf_file.name}...")
+            try:
+                pipeline.run_stream(batches(), upsert_batch)
+            except EmbeddingError as e:
+                # Keep what was stored; the file stays marked incomplete so the
+                # next sync picks it up again.
+                logger.error(f"Partially indexed {pdf_file.name}: {str(e)}")
+                return False
+
+            if not chunk_ids:
+                # e.g. a scanned, image-only PDF. Record it anyway so it isn't
+                # re-parsed on every sync; it is retried once its content changes.
+                logger.warning(f"No chunks created from {pdf_file.name} (no extractable text)")
+            else:
+                logger.info(f"Indexed {len(chunk_ids)} chunks from {pdf_file.name}")
+            self.manifest.record(pdf_file, digest, chunk_ids)
+            self.manifest.save()
             return True
-            
+
         except Exception as e:
-            logger.error(f"Error creating vectorstore: {str(e)}")
+            logger.error(f"Error indexing {pdf_file.name}: {str(e)}")
             return False
 
-    def similarity_search(self, query: str, k: int = 3) -> List[Document]:
-        """Perform similarity search on the vectorstore."""
+    def translate_query(self, query: str, turn: Optional[TurnContext] = None) -> str:
+        """Translate a query for search, reusing the turn's translation when one is given."""
+        if turn is not None and turn.message == query:
+            return turn.translated_query
+        return translation_service.translate_query_for_rag(query)
+
+    @property
+    def index_revision(self) -> str:
+        """Changes whenever the indexed documents change."""
+        return self.manifest.revision()
+
+    def embed_query(self, translated_query: str) -> List[float]:
+        """Embed an (already translated) search query through the query cache."""
+        model = getattr(self.embeddings, 'model', type(self.embeddings).__name__)
+        return self.query_cache.get_or_embed(
+            translated_query, model,
+            lambda text: self.embedding_breaker.call(
+                self.embeddings.embed_query, text, timeout=self.embedding_timeout
+            )
+        )
+
+    def embed_queries(self, translated_queries: List[str]) -> List[List[float]]:
+        """Batch version of embed_query: uncached queries are embedded in one request."""
+        model = getattr(self.embeddings, 'model', type(self.embeddings).__name__)
+        return self.query_cache.get_or_embed_many(
+            translated_queries, model,
+            lambda texts: self.batch_embedding_breaker.call(
+                embed_queries, self.embeddings, texts, timeout=self.embedding_timeout * 2
+            )
+        )
+
+    def refresh_lexical_index(self) -> None:
+        """Reload the lexical and metadata indexes if another process changed the index."""
+        revision = self.index_revision
+        if revision != self._lexical_revision:
+            logger.info("Index revision changed, reloading the lexical index")
+            self._lexical_revision = revision
+            self.lexical_index.reload()
+
+    def _prepare_search(self, filters: Optional[SearchFilter]) -> Optional[Set[str]]:
+        """Bring the lexical index up to date and resolve ``filters`` to the allowed chunk ids."""
+        if (not self.vectorstore and not len(self.lexical_index)
+                and self.embeddings and self.persist_directory.exists()):
+            # A store built before the lexical index existed: load it now so
+            # the backfill runs before filters are resolved against the index
+            self.load_existing_vectorstore()
+        self.refresh_lexical_index()
+        return self.allowed_ids(filters)
+
+    def allowed_ids(self, filters: Optional[SearchFilter]) -> Optional[Set[str]]:
+        """Ids of the chunks a filter lets through, or None when there is no filter."""
+        if filters is None or filters.is_empty():
+            return None
+        allowed = self.metadata_index.allowed(filters)
+        logger.debug(f"Filter {filters} allows {len(allowed)} chunks")
+        return allowed
+
+    def _vector_search(self, translated_query: str, k: int, allowed: Optional[Set[str]] = None,
+                       filters: Optional[SearchFilter] = None) -> Optional[List[Tuple[Document, float]]]:
+        """Vector search with relevance scores, or None if embeddings are unavailable."""
+        if not self.embeddings:
+            return None
         if not self.vectorstore:
             logger.warning("Vectorstore not initialized, attempting to load existing...")
             if not self.load_existing_vectorstore():
                 logger.error("Failed to load vectorstore")
-                return []
+                return None
 
-        # Translate query to English for RAG search
-        translated_query = translation_service.translate_query_for_rag(query)
-        if translated_query != query:
-            logger.info(f"Using translated query for search: '{translated_query[:50]}...'")
-        
         try:
-            results = self.vectorstore.similarity_search(translated_query, k=k)
-            logger.info(f"Found {len(results)} similar documents for query: {query[:50]}...")
-            return results
+            return self._vector_lookup(self.embed_query(translated_query), k, allowed, filters)
         except Exception as e:
-            logger.error(f"Error performing similarity search: {str(e)}")
-            return []
+            logger.error(f"Error performing vector search: {str(e)}")
+            return None
 
-    def similarity_search_with_score(self, query: str, k: int = 3) -> List[tuple]:
-        """Perform similarity search with relevance scores."""
+    def _exact_search_many(self, vectors: List[List[float]], k: int, allowed: Optional[Set[str]] = None,
+                           filters: Optional[SearchFilter] = None) -> Optional[List[List[Tuple[str, float]]]]:
+        """
+        Exact hits for each vector, restricted to ``allowed`` chunk ids if given.
+
+        Returns None when Chroma should be queried instead: the exact
+        index is disabled and the filter, if any, can be expressed as a
+        Chroma ``where`` clause (source and page, not tags).
+        """
+        exact = self.current_exact_index()
+        if exact is not None:
+            rows = None if allowed is None else exact.rows_for(allowed)
+            return exact.search_many(vectors, k, rows=rows)
+        if allowed is None or not filters.tags:
+            return None
+        if not allowed:
+            return [[] for _ in vectors]
+
+        # Tags are a comma-separated string Chroma can't match on, so the
+        # filter's chunks are brute-forced from a matrix cached per filter
+        key = (self.index_revision, filters)
+        subset = self.filtered_indexes.get(key)
+        if subset is None:
+            stored = self.vectorstore._collection.get(ids=sorted(allowed), include=['embeddings'])
+            subset = ExactIndex.from_vectors(stored['ids'], stored['embeddings'])
+            self.filtered_indexes.set(key, subset)
+        return subset.search_many(vectors, k)
+
+    def _vector_lookup(self, vector: List[float], k: int, allowed: Optional[Set[str]] = None,
+                       filters: Optional[SearchFilter] = None) -> List[Tuple[Document, float]]:
+        hits = self._exact_search_many([vector], k, allowed, filters)
+        if hits is not None:
+            return self._exact_results(hits[0])
+        return self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+            vector, k=k, filter=filters.chroma_where() if filters else None
+        )
+
+    def _combine_results(self, query: str, translated_query: str, k: int, mode: str,
+                         vector_results: Optional[List[Tuple[Document, float]]],
+                         allowed: Optional[Set[str]] = None) -> List[Tuple[Document, float]]:
+        """
+        Finish a search once the vector results (if any) are in.
+
+        Returns BM25 scores in lexical mode, relevance scores in vector mode
+        and fused rank scores in hybrid mode. Vector and hybrid searches
+        fall back to lexical-only when ``vector_results`` is None.
+        """
+        if mode != 'lexical' and vector_results is None:
+            logger.warning("Embeddings unavailable, falling back to lexical search")
+            mode = 'lexical'
+        if mode == 'vector':
+            return vector_results[:k]
+
+        # Match terms of the original query too, in case it was not translated well
+        lexical_query = translated_query if translated_query == query else f"{translated_query} {query}"
+        lexical_results = self.lexical_index.search(
+            lexical_query, k if mode == 'lexical' else max(k, self.hybrid_candidates), allowed=allowed
+        )
+        if mode == 'lexical':
+            return lexical_results
+
+        fused = reciprocal_rank_fusion(
+            [[doc for doc, _ in vector_results], [doc for doc, _ in lexical_results]], k=self.rrf_k
+        )
+        return fused[:k]
+
+    def _vector_search_batch(self, translated_queries: List[str], k: int, allowed: Optional[Set[str]] = None,
+                             filters: Optional[SearchFilter] = None) -> List[Optional[List[Tuple[Document, float]]]]:
+        """Batch version of _vector_search: one embedding request and one Chroma query."""
+        if not self.embeddings:
+            return [None] * len(translated_queries)
         if not self.vectorstore:
             logger.warning("Vectorstore not initialized, attempting to load existing...")
             if not self.load_existing_vectorstore():
                 logger.error("Failed to load vectorstore")
-                return []
+                return [None] * len(translated_queries)
+
+        try:
+            vectors = self.embed_queries(translated_queries)
+            exact_hits = self._exact_search_many(vectors, k, allowed, filters)
+            if exact_hits is not None:
+                return [self._exact_results(hits) for hits in exact_hits]
+
+            found = self.vectorstore._collection.query(
+                query_embeddings=vectors, n_results=k,
+                where=filters.chroma_where() if filters else None,
+                include=['documents', 'metadatas', 'distances']
+            )
+        except Exception as e:
+            logger.error(f"Error performing batch vector search: {str(e)}")
+            return [None] * len(translated_queries)
+
+        relevance = self.vectorstore._select_relevance_score_fn()
+        return [
+            [
+                (Document(page_content=text, metadata=metadata or {}, id=chunk_id), relevance(distance))
+                for chunk_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+            ]
+            for ids, texts, metadatas, distances in zip(
+                found['ids'], found['documents'], found['metadatas'], found['distances']
+            )
+        ]
+
+    def batch_search(self, queries: List[str], k: int = 3, mode: Optional[str] = None,
+                     rerank: Optional[str] = None,
+                     filters: Optional[SearchFilter] = None) -> List[List[Tuple[Document, float]]]:
+        """
+        Run ``search`` for many queries at once.
+
+        Queries are translated in batched LLM requests, embedded in one
+        request and looked up in a single Chroma query, so per-query
+        overhead is paid once per batch. ``filters`` applies to every query.
+        """
+        mode = mode or self.retrieval_mode
+        rerank = rerank or self.rerank_method
+        allowed = self._prepare_search(filters)
+        translated_queries = translation_service.translate_batch(queries)
+
+        fetch, vector_k = self._candidate_counts(k, mode, rerank)
+        vector_results = [None] * len(queries)
+        if mode != 'lexical':
+            vector_results = self._vector_search_batch(translated_queries, vector_k, allowed, filters)
+
+        results = [
+            self._rerank(
+                translated_query,
+                self._combine_results(query, translated_query, fetch, mode, vectors, allowed),
+                k, rerank, query_embedded=vectors is not None
+            )
+            for query, translated_query, vectors in zip(queries, translated_queries, vector_results)
+        ]
+        logger.info(f"Batch search ({mode}) of {len(queries)} queries done")
+        return results
+
+    def _candidate_counts(self, k: int, mode: str, rerank: str) -> Tuple[int, int]:
+        """Number of results to fuse and of vector hits to fetch before re-ranking down to ``k``."""
+        fetch = k if rerank == 'none' else max(k, self.rerank_candidates)
+        return fetch, (fetch if mode == 'vector' else max(fetch, self.hybrid_candidates))
+
+    def _candidate_vectors(self, translated_query: str, results: List[Tuple[Document, float]],
+                           query_embedded: bool = False) -> Tuple[List[float], List[List[float]]]:
+        """
+        Query and chunk vectors for MMR.
+
+        If the search already embedded the query (``query_embedded``), its
+        cached vector is reused and chunk vectors come from the exact index
+        or are read back from Chroma. Otherwise (lexical mode, or the
+        embedding backend failed) vectors from the local hashing embedder
+        are used, so re-ranking never waits on the embedding API.
+        """
+        ids = [getattr(doc, 'id', None) for doc, _ in results]
+        if query_embedded and self.embeddings and self.vectorstore and all(ids):
+            try:
+                exact = self.current_exact_index()
+                vectors = exact.vectors(ids) if exact is not None else None
+                if vectors is None:
+                    stored = self.vectorstore._collection.get(ids=ids, include=['embeddings'])
+                    by_id = dict(zip(stored['ids'], stored['embeddings']))
+                    if len(by_id) == len(set(ids)):
+                        vectors = [by_id[chunk_id] for chunk_id in ids]
+                if vectors is not None:
+                    return self.embed_query(translated_query), vectors
+            except Exception as e:
+                logger.warning(f"Could not read candidate embeddings, using local vectors: {str(e)}")
+
+        return (self.fallback_embeddings.embed_query(translated_query),
+                self.fallback_embeddings.embed_documents([doc.page_content for doc, _ in results]))
+
+    def _rerank(self, translated_query: str, results: List[Tuple[Document, float]], k: int,
+                rerank: str, lambda_mult: Optional[float] = None,
+                query_embedded: bool = False) -> List[Tuple[Document, float]]:
+        """Cut over-fetched ``results`` down to ``k``, keeping their original scores for MMR."""
+        if rerank == 'none' or len(results) <= 1:
+            return results[:k]
+
+        started = time.perf_counter()
+        if rerank == 'cross-encoder':
+            reranker = self.cross_encoder
+            if reranker is not None:
+                return reranker.rerank(translated_query, results, k)
+            logger.warning("Cross-encoder unavailable, re-ranking with MMR")
+
+        query_vector, doc_vectors = self._candidate_vectors(translated_query, results, query_embedded)
+        order = mmr(query_vector, doc_vectors, k, self.mmr_lambda if lambda_mult is None else lambda_mult)
+        logger.debug(f"MMR picked {len(order)} of {len(results)} candidates "
+                     f"in {(time.perf_counter() - started) * 1000:.2f}ms")
+        return [results[i] for i in order]
+
+    def score_type(self, mode: Optional[str] = None, rerank: Optional[str] = None) -> str:
+        """
+        What the scores ``search`` returns for these options measure.
+
+        'cross_encoder' for cross-encoder re-ranking, otherwise 'relevance'
+        (vector), 'bm25' (lexical) or 'rrf' (hybrid rank fusion). MMR keeps
+        these scores but orders results by its own pick, not by score.
+        """
+        if (rerank or self.rerank_method) == 'cross-encoder' and self.cross_encoder is not None:
+            return 'cross_encoder'
+        return {'vector': 'relevance', 'lexical': 'bm25', 'hybrid': 'rrf'}[mode or self.retrieval_mode]
+
+    @property
+    def cross_encoder(self) -> Optional[CrossEncoderReranker]:
+        """The RERANK_CROSS_ENCODER model, loaded on first use; None if unset or unavailable."""
+        if self._cross_encoder is None:
+            model_name = os.getenv('RERANK_CROSS_ENCODER', 'cross-encoder/ms-marco-MiniLM-L-6-v2')
+            try:
+                self._cross_encoder = CrossEncoderReranker(model_name)
+            except Exception as e:
+                logger.error(f"Could not load cross-encoder {model_name}: {str(e)}")
+                self._cross_encoder = False
+        return self._cross_encoder or None
+
+    def search(self, query: str, k: int = 3, turn: Optional[TurnContext] = None,
+               mode: Optional[str] = None, rerank: Optional[str] = None,
+               lambda_mult: Optional[float] = None,
+               filters: Optional[SearchFilter] = None) -> List[Tuple[Document, float]]:
+        """
+        Retrieve the ``k`` chunks most relevant to a query, with scores.
+
+        ``mode`` is 'vector', 'lexical' or 'hybrid' and defaults to
+        RETRIEVAL_MODE. ``rerank`` is 'none', 'mmr' or 'cross-encoder' and
+        defaults to RERANK_METHOD; re-ranking picks ``k`` out of
+        RERANK_CANDIDATES over-fetched chunks. ``filters`` restricts the
+        search to chunks by source, page range and tags before scoring.
+        """
+        mode = mode or self.retrieval_mode
+        rerank = rerank or self.rerank_method
+        allowed = self._prepare_search(filters)
 
         # Translate query to English for RAG search
-        translated_query = translation_service.translate_query_for_rag(query)
+        translated_query = self.translate_query(query, turn)
         if translated_query != query:
             logger.info(f"Using translated query for search: '{translated_query[:50]}...'")
-        
+
+        fetch, vector_k = self._candidate_counts(k, mode, rerank)
+        vector_results = None
+        if mode != 'lexical':
+            vector_results = self._vector_search(translated_query, vector_k, allowed, filters)
+
+        results = self._combine_results(query, translated_query, fetch, mode, vector_results, allowed)
+        results = self._rerank(translated_query, results, k, rerank, lambda_mult,
+                               query_embedded=vector_results is not None)
+        logger.info(f"Found {len(results)} documents ({mode}) for query: '{query[:50]}...'")
+        return results
+
+    def similarity_search(self, query: str, k: int = 3, turn: Optional[TurnContext] = None,
+                          mode: Optional[str] = None, rerank: Optional[str] = None,
+                          filters: Optional[SearchFilter] = None) -> List[Document]:
+        """Perform similarity search on the vectorstore."""
         try:
-            results = self.vectorstore.similarity_search_with_score(translated_query, k=k)
-            logger.info(f"Found {len(results)} similar documents with scores for query: '{query[:50]}...'")
-            
+            return [doc for doc, _ in self.search(query, k=k, turn=turn, mode=mode, rerank=rerank,
+                                                  filters=filters)]
+        except Exception as e:
+            logger.error(f"Error performing similarity search: {str(e)}")
+            return []
+
+    def similarity_search_with_score(self, query: str, k: int = 3, turn: Optional[TurnContext] = None,
+                                     mode: Optional[str] = None, rerank: Optional[str] = None,
+                                     filters: Optional[SearchFilter] = None) -> List[tuple]:
+        """Perform similarity search with relevance scores."""
+        try:
+            results = self.search(query, k=k, turn=turn, mode=mode, rerank=rerank, filters=filters)
+
             # Log the scores for debugging
             for i, (doc, score) in enumerate(results):
                 logger.debug(f"Result {i+1}: Score={score:.4f}, Content preview: {doc.page_content[:100]}...")
-            
+
             return results
         except Exception as e:
             logger.error(f"Error performing similarity search with scores: {str(e)}")
             return []
 
-    def test_search(self, query: str, k: int = 5) -> List[tuple]:
+    def test_search(self, query: str, k: int = 5, turn: Optional[TurnContext] = None) -> List[tuple]:
         """Test search with detailed logging for debugging."""
         logger.info(f"Testing search with query: '{query}'")
         
@@ -209,13 +907,15 @@ class VectorService:
                 return []
 
         # Translate query to English for RAG search
-        translated_query = translation_service.translate_query_for_rag(query)
+        translated_query = self.translate_query(query, turn)
         if translated_query != query:
             logger.info(f"Using translated query for test search: '{translated_query[:50]}...'")
         
         try:
             # Get all results without score filtering
-            results = self.vectorstore.similarity_search_with_score(translated_query, k=k)
+            results = self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+                self.embed_query(translated_query), k=k
+            )
             logger.info(f"Raw search returned {len(results)} results")
             
             for i, (doc, score) in enumerate(results):
@@ -243,10 +943,15 @@ class VectorService:
         
         return self.vectorstore.as_retriever(search_kwargs=search_kwargs)
 
-    def get_relevant_context(self, query: str, max_docs: int = 3) -> str:
+    def get_relevant_context(self, query: str, max_docs: int = 3, turn: Optional[TurnContext] = None,
+                             rerank: Optional[str] = None, filters: Optional[SearchFilter] = None) -> str:
         """Get relevant context as a formatted string for chat integration."""
-        docs = self.similarity_search(query, k=max_docs)
-        
+        docs = self.similarity_search(query, k=max_docs, turn=turn, rerank=rerank, filters=filters)
+        return self.format_context(docs)
+
+    @staticmethod
+    def format_context(docs: List[Document]) -> str:
+        """Format retrieved chunks as numbered, source-labelled prompt context."""
         if not docs:
             return ""
         
@@ -258,10 +963,105 @@ class VectorService:
         
         return "\n\n---\n\n".join(context_parts)
 
-    def initialize(self, force_recreate: bool = False) -> bool:
+    async def _aensure_vectorstore(self) -> bool:
+        if self.vectorstore:
+            return True
+        logger.warning("Vectorstore not initialized, attempting to load existing...")
+        if not await asyncio.to_thread(self.load_existing_vectorstore):
+            logger.error("Failed to load vectorstore")
+            return False
+        return True
+
+    async def atranslate_query(self, query: str, turn: Optional[TurnContext] = None) -> str:
+        """Async version of translate_query."""
+        if turn is not None and turn.message == query:
+            return await turn.atranslated_query()
+        return await translation_service.atranslate_query_for_rag(query)
+
+    async def aembed_query(self, translated_query: str) -> List[float]:
+        """Async version of embed_query."""
+        model = getattr(self.embeddings, 'model', type(self.embeddings).__name__)
+        return await self.query_cache.aget_or_embed(
+            translated_query, model,
+            lambda text: self.embedding_breaker.acall(
+                self.embeddings.aembed_query, text, timeout=self.embedding_timeout
+            )
+        )
+
+    async def _avector_search(self, translated_query: str, k: int, allowed: Optional[Set[str]] = None,
+                              filters: Optional[SearchFilter] = None) -> Optional[List[Tuple[Document, float]]]:
+        """Async version of _vector_search."""
+        if not self.embeddings or not await self._aensure_vectorstore():
+            return None
+
+        try:
+            embedding = await self.aembed_query(translated_query)
+            return await asyncio.to_thread(self._vector_lookup, embedding, k, allowed, filters)
+        except Exception as e:
+            logger.error(f"Error performing vector search: {str(e)}")
+            return None
+
+    async def asearch(self, query: str, k: int = 3, turn: Optional[TurnContext] = None,
+                      mode: Optional[str] = None, rerank: Optional[str] = None,
+                      lambda_mult: Optional[float] = None,
+                      filters: Optional[SearchFilter] = None) -> List[Tuple[Document, float]]:
+        """
+        Async version of search.
+
+        Translation and query embedding are awaited on the network; the
+        local index refresh, Chroma and BM25 lookups run in worker threads.
+        """
+        mode = mode or self.retrieval_mode
+        rerank = rerank or self.rerank_method
+        # Reloading the lexical index reads SQLite, so keep it off the event loop
+        allowed = await asyncio.to_thread(self._prepare_search, filters)
+        translated_query = await self.atranslate_query(query, turn)
+
+        fetch, vector_k = self._candidate_counts(k, mode, rerank)
+        vector_results = None
+        if mode != 'lexical':
+            vector_results = await self._avector_search(translated_query, vector_k, allowed, filters)
+
+        def finish():
+            results = self._combine_results(query, translated_query, fetch, mode, vector_results, allowed)
+            return self._rerank(translated_query, results, k, rerank, lambda_mult,
+                                query_embedded=vector_results is not None)
+
+        results = await asyncio.to_thread(finish)
+        logger.info(f"Found {len(results)} documents ({mode}) for query: '{query[:50]}...'")
+        return results
+
+    async def asimilarity_search(self, query: str, k: int = 3, turn: Optional[TurnContext] = None,
+                                 mode: Optional[str] = None, rerank: Optional[str] = None,
+                                 filters: Optional[SearchFilter] = None) -> List[Document]:
+        """Async version of similarity_search."""
+        try:
+            return [doc for doc, _ in await self.asearch(query, k=k, turn=turn, mode=mode, rerank=rerank,
+                                                         filters=filters)]
+        except Exception as e:
+            logger.error(f"Error performing similarity search: {str(e)}")
+            return []
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 3, turn: Optional[TurnContext] = None,
+                                            mode: Optional[str] = None, rerank: Optional[str] = None,
+                                            filters: Optional[SearchFilter] = None) -> List[tuple]:
+        """Async version of similarity_search_with_score."""
+        try:
+            return await self.asearch(query, k=k, turn=turn, mode=mode, rerank=rerank, filters=filters)
+        except Exception as e:
+            logger.error(f"Error performing similarity search with scores: {str(e)}")
+            return []
+
+    async def aget_relevant_context(self, query: str, max_docs: int = 3, turn: Optional[TurnContext] = None,
+                                    rerank: Optional[str] = None, filters: Optional[SearchFilter] = None) -> str:
+        """Async version of get_relevant_context."""
+        docs = await self.asimilarity_search(query, k=max_docs, turn=turn, rerank=rerank, filters=filters)
+        return self.format_context(docs)
+
+    def initialize(self, force_recreate: bool = False, resume: bool = False, full: bool = False) -> bool:
         """Initialize the vector service."""
         logger.info("Initializing Vector Service...")
-        return self.create_vectorstore(force_recreate=force_recreate)
+        return self.create_vectorstore(force_recreate=force_recreate, resume=resume, full=full)
 
 
 # Global instance
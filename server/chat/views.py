@@ -1,9 +1,23 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
+from .answer_cache import answer_cache
+from .memory import conversation_memory
+from .metadata_filter import SearchFilter
 from .models import Chat, Message
-from .serializers import ChatSerializer, MessageSerializer, CreateMessageSerializer
+from .pagination import paginate_messages, parse_page_size
+from .resilience import breaker_stats
+from .serializers import ChatSerializer, ChatSummarySerializer, MessageSerializer, CreateMessageSerializer
+from .search_service import search_service
 from .services import chat_service
+from .translation_service import translation_service
 from .vector_service_new import vector_service
 
 
@@ -15,16 +29,81 @@ def create_chat(request):
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@api_view(['GET'])
+def get_chat(request, chat_id):
+    """Get a chat without its messages"""
+    try:
+        chat = Chat.objects.get(chat_id=chat_id)
+        serializer = ChatSummarySerializer(chat)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    except Chat.DoesNotExist:
+        return Response({'error': 'Chat not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
 @api_view(['GET'])
 def get_chat_messages(request, chat_id):
-    """Get all messages from a specific chat"""
+    """
+    Get messages from a specific chat.
+
+    With any of ``page_size``, ``before`` or ``since`` the response is a
+    cursor-paginated page; without them every message is returned as a
+    plain list, as before.
+    """
     try:
         chat = Chat.objects.get(chat_id=chat_id)
+    except Chat.DoesNotExist:
+        return Response({'error': 'Chat not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    params = request.query_params
+    if not any(key in params for key in ('page_size', 'before', 'since')):
         messages = chat.messages.all()
         serializer = MessageSerializer(messages, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
-    except Chat.DoesNotExist:
-        return Response({'error': 'Chat not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        page = paginate_messages(
+            chat.messages.all(),
+            page_size=parse_page_size(params.get('page_size')),
+            before=params.get('before'),
+            since=params.get('since'),
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'results': MessageSerializer(page['messages'], many=True).data,
+        'has_more': page['has_more'],
+        'before': page['before'],
+        'since': page['since'],
+    }, status=status.HTTP_200_OK)
+
+
+def recent_messages_query(chat, before, limit=None):
+    """
+    Query for the last ``limit`` messages of a chat before ``before``, newest first.
+
+    Messages already folded into the chat summary are skipped. Backed by
+    the (chat, created_at) index, so the cost depends on the window size
+    rather than the length of the chat.
+    """
+    if limit is None:
+        limit = settings.CHAT_HISTORY_WINDOW
+    messages = chat.messages.filter(created_at__lt=before)
+    if chat.summarized_until:
+        messages = messages.filter(created_at__gt=chat.summarized_until)
+    return messages.order_by('-created_at').values('role', 'message')[:limit]
+
+
+def get_chat_history(chat, before, limit=None):
+    """Return the most recent unsummarized messages of a chat, oldest first, for the chat service."""
+    history = list(recent_messages_query(chat, before, limit))
+    history.reverse()
+    return history
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
 
 
 @api_view(['POST'])
@@ -40,21 +119,13 @@ def send_message(request):
             user_message = serializer.save()
             
             # Get chat history for context
-            chat_history = []
-            previous_messages = chat.messages.filter(
-                created_at__lt=user_message.created_at
-            ).order_by('created_at')
-            
-            for msg in previous_messages:
-                chat_history.append({
-                    'role': msg.role,
-                    'message': msg.message
-                })
+            chat_history = get_chat_history(chat, user_message.created_at)
             
             # Process message with Langchain
             ai_response = chat_service.get_chat_response(
                 message=user_message.message,
-                chat_history=chat_history
+                chat_history=chat_history,
+                summary=chat.summary
             )
             
             # Save AI response
@@ -64,6 +135,9 @@ def send_message(request):
                 chat=chat
             )
             
+            # Fold older turns into the chat summary in the background
+            conversation_memory.schedule_refresh(chat.chat_id)
+            
             # Return both messages
             user_serializer = MessageSerializer(user_message)
             ai_serializer = MessageSerializer(ai_message)
@@ -81,36 +155,117 @@ def send_message(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+def stream_message(request):
+    """
+    Send a message to a chat and stream the AI response as Server-Sent Events.
+
+    Emits a ``user_message`` event, then ``token`` events as the model
+    generates text, and finally ``ai_response`` with the saved message.
+    The assistant message is saved when the stream ends; if the client
+    disconnects early, whatever was generated so far is saved instead.
+    """
+    serializer = CreateMessageSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        chat = Chat.objects.get(chat_id=serializer.validated_data['chat'].chat_id)
+    except Chat.DoesNotExist:
+        return Response({'error': 'Chat not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    user_message = serializer.save()
+    chat_history = get_chat_history(chat, user_message.created_at)
+
+    def event_stream():
+        parts = []
+        tokens = chat_service.stream_chat_response(
+            message=user_message.message,
+            chat_history=chat_history,
+            summary=chat.summary
+        )
+        try:
+            yield sse_event('user_message', MessageSerializer(user_message).data)
+            for token in tokens:
+                parts.append(token)
+                yield sse_event('token', {'text': token})
+        except GeneratorExit:
+            # Client went away: stop generating, keep the partial answer
+            tokens.close()
+            if parts:
+                Message.objects.create(message=''.join(parts), role='assistant', chat=chat)
+            raise
+
+        ai_message = Message.objects.create(
+            message=''.join(parts),
+            role='assistant',
+            chat=chat
+        )
+        conversation_memory.schedule_refresh(chat.chat_id)
+        yield sse_event('ai_response', MessageSerializer(ai_message).data)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def search_options_error(mode, rerank):
+    """Validate the optional retrieval mode and re-ranking method of a search request"""
+    if mode is not None and mode not in vector_service.RETRIEVAL_MODES:
+        return f"mode must be one of: {', '.join(vector_service.RETRIEVAL_MODES)}"
+    if rerank is not None and rerank not in vector_service.RERANK_METHODS:
+        return f"rerank must be one of: {', '.join(vector_service.RERANK_METHODS)}"
+    return None
+
+
+def format_search_results(results):
+    """Serialize (document, score) pairs for the document search endpoints"""
+    return [{
+        'content': doc.page_content,
+        'source': doc.metadata.get('source', 'Unknown'),
+        'page': doc.metadata.get('page', 0),
+        'relevance_score': score,
+        'metadata': doc.metadata
+    } for doc, score in results]
+
+
 @api_view(['POST'])
 def search_documents(request):
-    """Search for relevant documents using vector similarity"""
+    """Search for relevant documents using vector, lexical (BM25) or hybrid retrieval, optionally filtered"""
     query = request.data.get('query', '')
     max_docs = request.data.get('max_docs', 5)
+    mode = request.data.get('mode')
+    rerank = request.data.get('rerank')
     
     if not query:
         return Response(
             {'error': 'Query is required'}, 
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    options_error = search_options_error(mode, rerank)
+    if options_error:
+        return Response({'error': options_error}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        filters = SearchFilter.from_dict(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
         # Perform similarity search with scores
-        results = vector_service.similarity_search_with_score(query, k=max_docs)
+        results = vector_service.similarity_search_with_score(query, k=max_docs, mode=mode, rerank=rerank,
+                                                              filters=filters)
         
-        formatted_results = []
-        for doc, score in results:
-            formatted_results.append({
-                'content': doc.page_content,
-                'source': doc.metadata.get('source', 'Unknown'),
-                'page': doc.metadata.get('page', 0),
-                'relevance_score': score,
-                'metadata': doc.metadata
-            })
+        formatted_results = format_search_results(results)
         
         return Response({
             'query': query,
             'results': formatted_results,
-            'total_found': len(formatted_results)
+            'total_found': len(formatted_results),
+            'score_type': vector_service.score_type(mode, rerank)
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -120,6 +275,54 @@ def search_documents(request):
         )
 
 
+@api_view(['POST'])
+def batch_search_documents(request):
+    """Search for relevant documents for many queries in one request"""
+    queries = request.data.get('queries')
+    max_docs = request.data.get('max_docs', 5)
+    mode = request.data.get('mode')
+    rerank = request.data.get('rerank')
+
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+        return Response(
+            {'error': 'queries must be a non-empty list of non-empty strings'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if len(queries) > settings.BATCH_SEARCH_MAX_QUERIES:
+        return Response(
+            {'error': f'At most {settings.BATCH_SEARCH_MAX_QUERIES} queries per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    options_error = search_options_error(mode, rerank)
+    if options_error:
+        return Response({'error': options_error}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        filters = SearchFilter.from_dict(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        batch_results = vector_service.batch_search(queries, k=max_docs, mode=mode, rerank=rerank, filters=filters)
+
+        return Response({
+            'results': [{
+                'query': query,
+                'results': format_search_results(results),
+                'total_found': len(results)
+            } for query, results in zip(queries, batch_results)],
+            'score_type': vector_service.score_type(mode, rerank)
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response(
+            {'error': f'Search failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['POST'])
 def initialize_vectorstore(request):
     """Initialize or recreate the vector store"""
@@ -155,6 +358,7 @@ def vectorstore_status(request):
             # Try to load existing vectorstore
             vector_service.create_vectorstore(force_recreate=False)
         
+        embeddings = vector_service.embeddings
         if vector_service.vectorstore:
             collection = vector_service.vectorstore._collection
             doc_count = collection.count() if hasattr(collection, 'count') else 0
@@ -162,13 +366,25 @@ def vectorstore_status(request):
             return Response({
                 'status': 'initialized',
                 'document_count': doc_count,
-                'embeddings_available': vector_service.embeddings is not None
+                'embeddings_available': vector_service.embeddings is not None,
+                'embedding_backend': vector_service.embedding_backend_id,
+                'index_embedding_backend': vector_service.index_backend_id,
+                'embedding_cache': embeddings.stats() if hasattr(embeddings, 'stats') else None,
+                'query_embedding_cache': vector_service.query_cache.stats(),
+                'lexical_index': vector_service.lexical_index.stats(),
+                'metadata_index': vector_service.metadata_index.stats(),
+                'exact_index': vector_service.exact_index.stats() if vector_service.exact_index else None,
+                'retrieval_mode': vector_service.retrieval_mode
             }, status=status.HTTP_200_OK)
         else:
             return Response({
                 'status': 'not_initialized',
                 'document_count': 0,
-                'embeddings_available': vector_service.embeddings is not None
+                'embeddings_available': vector_service.embeddings is not None,
+                'embedding_backend': vector_service.embedding_backend_id,
+                'index_embedding_backend': vector_service.index_backend_id,
+                'lexical_index': vector_service.lexical_index.stats(),
+                'retrieval_mode': vector_service.retrieval_mode
             }, status=status.HTTP_200_OK)
             
     except Exception as e:
@@ -179,6 +395,25 @@ def vectorstore_status(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+def cache_stats(request):
+    """Get hit/miss statistics for the embedding, translation and answer caches"""
+    embeddings = vector_service.embeddings
+    return Response({
+        'embedding_cache': embeddings.stats() if hasattr(embeddings, 'stats') else None,
+        'query_embedding_cache': vector_service.query_cache.stats(),
+        'translation_cache': translation_service.cache_stats(),
+        'answer_cache': answer_cache.stats(),
+        'search_cache': search_service.cache.stats(),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def dependency_status(request):
+    """Get the circuit breaker state of each external dependency"""
+    return Response({'circuits': breaker_stats()}, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 def test_search(request):
     """Test search with detailed logging for debugging"""
@@ -216,4 +451,111 @@ def test_search(request):
         return Response(
             {'error': f'Test search failed: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+# Async views, served natively when running under ASGI (server/asgi.py).
+# DRF's @api_view is sync-only, so these use plain Django async views.
+
+async def aget_chat_history(chat, before, limit=None):
+    """Async version of get_chat_history."""
+    history = [msg async for msg in recent_messages_query(chat, before, limit)]
+    history.reverse()
+    return history
+
+
+def parse_json_body(request):
+    """Decode a JSON request body, returning None if it is malformed."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@csrf_exempt
+@require_POST
+async def async_send_message(request):
+    """Async version of send_message"""
+    data = parse_json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = CreateMessageSerializer(data=data)
+    # Validation looks the chat up in the database
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        chat = serializer.validated_data['chat']
+        
+        # Save user message
+        user_message = await Message.objects.acreate(**serializer.validated_data)
+        
+        # Get chat history for context
+        chat_history = await aget_chat_history(chat, user_message.created_at)
+        
+        ai_response = await chat_service.aget_chat_response(
+            message=user_message.message,
+            chat_history=chat_history,
+            summary=chat.summary
+        )
+        
+        ai_message = await Message.objects.acreate(
+            message=ai_response,
+            role='assistant',
+            chat=chat
+        )
+        conversation_memory.schedule_refresh(chat.chat_id)
+        
+        return JsonResponse({
+            'user_message': MessageSerializer(user_message).data,
+            'ai_response': MessageSerializer(ai_message).data
+        }, status=status.HTTP_201_CREATED, json_dumps_params={'ensure_ascii': False})
+        
+    except Exception as e:
+        return JsonResponse({'error': f'Failed to process message: {str(e)}'},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@csrf_exempt
+@require_POST
+async def async_search_documents(request):
+    """Async version of search_documents"""
+    data = parse_json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+
+    query = data.get('query', '')
+    max_docs = data.get('max_docs', 5)
+    mode = data.get('mode')
+    rerank = data.get('rerank')
+    
+    if not query:
+        return JsonResponse({'error': 'Query is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    options_error = search_options_error(mode, rerank)
+    if options_error:
+        return JsonResponse({'error': options_error}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        filters = SearchFilter.from_dict(data)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        results = await vector_service.asimilarity_search_with_score(query, k=max_docs, mode=mode, rerank=rerank,
+                                                                     filters=filters)
+        
+        formatted_results = format_search_results(results)
+        
+        return JsonResponse({
+            'query': query,
+            'results': formatted_results,
+            'total_found': len(formatted_results),
+            'score_type': vector_service.score_type(mode, rerank)
+        }, status=status.HTTP_200_OK, json_dumps_params={'ensure_ascii': False})
+        
+    except Exception as e:
+        return JsonResponse({'error': f'Search failed: {str(e)}'},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -140,3 +140,28 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
 }
+
+# Chat settings
+# Number of earlier messages sent to the model as conversation history
+CHAT_HISTORY_WINDOW = int(os.getenv('CHAT_HISTORY_WINDOW', 25))
+
+# Messages always kept verbatim; older ones are folded into the chat summary
+# in the background once CHAT_SUMMARY_EVERY of them have accumulated
+CHAT_RECENT_MESSAGES = int(os.getenv('CHAT_RECENT_MESSAGES', 6))
+CHAT_SUMMARY_EVERY = int(os.getenv('CHAT_SUMMARY_EVERY', 4))
+
+# Default and maximum page size for cursor-paginated chat messages
+CHAT_MESSAGES_PAGE_SIZE = int(os.getenv('CHAT_MESSAGES_PAGE_SIZE', 30))
+CHAT_MESSAGES_MAX_PAGE_SIZE = int(os.getenv('CHAT_MESSAGES_MAX_PAGE_SIZE', 100))
+
+# Prompt token budgets (approximate tokens, see chat/prompt_builder.py).
+# Sections are trimmed to their budget, then lower-value content is dropped
+# until the whole prompt fits PROMPT_TOKEN_TARGET.
+PROMPT_TOKEN_TARGET = int(os.getenv('PROMPT_TOKEN_TARGET', 8000))
+PROMPT_BUDGET_SUMMARY = int(os.getenv('PROMPT_BUDGET_SUMMARY', 400))
+PROMPT_BUDGET_RAG = int(os.getenv('PROMPT_BUDGET_RAG', 2400))
+PROMPT_BUDGET_WEB = int(os.getenv('PROMPT_BUDGET_WEB', 800))
+PROMPT_BUDGET_HISTORY = int(os.getenv('PROMPT_BUDGET_HISTORY', 1500))
+
+# Most queries accepted by one /api/documents/search/batch/ request
+BATCH_SEARCH_MAX_QUERIES = int(os.getenv('BATCH_SEARCH_MAX_QUERIES', 500))